@@ -0,0 +1,125 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from preprocessing import to_gray
+from tesseract_pool import run_tesseract_line
+from tiling import _rect
+
+logger = logging.getLogger(__name__)
+
+# Tiers in the order a region passes through them
+TIER_FAST = 'fast'
+TIER_REFINE = 'refine'
+TIER_TESSERACT = 'tesseract'
+TIERS = (TIER_FAST, TIER_REFINE, TIER_TESSERACT)
+
+# Regions below this confidence after every tier has had a go are dropped
+MIN_CONFIDENCE = 0.3
+# Regions the fast pass reads below this are re-read by the slower tiers
+DEFAULT_ESCALATION_CONFIDENCE = 0.6
+REGION_PADDING = 4
+# Tesseract reads small print far better once glyphs are about this tall
+TESSERACT_LINE_HEIGHT = 48
+MAX_TESSERACT_UPSCALE = 4.0
+
+
+def new_tier_stats() -> Dict[str, Dict]:
+    return {tier: {'seconds': 0.0, 'regions': 0, 'improved': 0} for tier in TIERS}
+
+
+def merge_tier_stats(total: Dict[str, Dict], stats: Dict[str, Dict]):
+    for tier, tier_stats in stats.items():
+        for key, value in tier_stats.items():
+            total[tier][key] += value
+
+
+def summarize_tiers(stats: Dict[str, Dict], escalate_below: float) -> Dict:
+    """Per-tier timing plus how many fast-pass regions needed a slower tier"""
+    regions = stats[TIER_FAST]['regions']
+    escalated = max(stats[TIER_REFINE]['regions'], stats[TIER_TESSERACT]['regions'])
+    return {
+        'escalate_below': escalate_below,
+        'regions': regions,
+        'escalated': escalated,
+        'escalation_rate': escalated / regions if regions else 0.0,
+        'tiers': {tier: dict(tier_stats, seconds=round(tier_stats['seconds'], 4)) for tier, tier_stats in stats.items()}
+    }
+
+
+def _region_crop(gray: np.ndarray, bbox: List) -> np.ndarray:
+    left, top, right, bottom = _rect(bbox)
+    height, width = gray.shape[:2]
+    x0 = max(0, int(left) - REGION_PADDING)
+    y0 = max(0, int(top) - REGION_PADDING)
+    x1 = min(width, int(right) + REGION_PADDING)
+    y1 = min(height, int(bottom) + REGION_PADDING)
+    return gray[y0:y1, x0:x1]
+
+
+def _refine_with_easyocr(reader, crop: np.ndarray) -> Tuple[str, float]:
+    # Stretch contrast and decode with beam search instead of the fast greedy decoder
+    stretched = cv2.normalize(crop, None, 0, 255, cv2.NORM_MINMAX)
+    height, width = stretched.shape[:2]
+    results = reader.recognize(
+        stretched, horizontal_list=[[0, width, 0, height]], free_list=[],
+        decoder='beamsearch', detail=1, paragraph=False
+    )
+    best = max((result for result in results or [] if len(result) >= 3), key=lambda result: result[2], default=None)
+    return (best[1], float(best[2])) if best else ('', 0.0)
+
+
+def _refine_with_tesseract(crop: np.ndarray) -> Tuple[str, float]:
+    scale = min(MAX_TESSERACT_UPSCALE, TESSERACT_LINE_HEIGHT / max(1, crop.shape[0]))
+    if scale > 1:
+        crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    return run_tesseract_line(crop)
+
+
+def escalate_regions(reader, tesseract_available: bool, image_array: np.ndarray, results: List[Tuple],
+                     escalate_below: float, stats: Dict[str, Dict], deadline: Optional[float] = None) -> List[Tuple]:
+    """Re-read weak fast-pass (bbox, text, confidence) regions with slower tiers and merge the best reading.
+
+    Each region keeps whichever tier read it most confidently; regions that
+    end up below MIN_CONFIDENCE are dropped. Past the time.perf_counter()
+    deadline, remaining regions keep their fast-pass reading.
+    """
+    gray = None
+    merged = []
+
+    for bbox, text, confidence in results:
+        if confidence < escalate_below and (deadline is None or time.perf_counter() < deadline):
+            if gray is None:
+                gray = to_gray(image_array)
+            crop = _region_crop(gray, bbox)
+            tiers = []
+            # Engines without a recognition-only entry point go straight to Tesseract
+            if reader is not None and hasattr(reader, 'recognize'):
+                tiers.append((TIER_REFINE, lambda: _refine_with_easyocr(reader, crop)))
+            if tesseract_available:
+                tiers.append((TIER_TESSERACT, lambda: _refine_with_tesseract(crop)))
+
+            for tier, recognize in tiers:
+                if confidence >= escalate_below or crop.size == 0:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                started = time.perf_counter()
+                try:
+                    tier_text, tier_confidence = recognize()
+                except Exception as e:
+                    logger.error(f"{tier} tier failed on region {bbox}: {e}")
+                    tier_text, tier_confidence = '', 0.0
+                stats[tier]['seconds'] += time.perf_counter() - started
+                stats[tier]['regions'] += 1
+                if tier_text.strip() and tier_confidence > confidence:
+                    text, confidence = tier_text, tier_confidence
+                    stats[tier]['improved'] += 1
+
+        if confidence > MIN_CONFIDENCE and text and text.strip():
+            merged.append((bbox, text, confidence))
+
+    return merged
@@ -6,6 +6,8 @@ from .auth import (
 )
 from .ocr_processor import OCRProcessor
 from .table_extractor import TableExtractor
+from .raster import PageRasterCache
+from .tesseract_search import TesseractConfigSearch
 from .classifier import DocumentClassifier
 from .redactor import DataRedactor
 from .utils import KeyValueExtractor, create_sample_users
@@ -26,8 +28,9 @@ app.add_middleware(
 
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
-ocr_processor = OCRProcessor()
-table_extractor = TableExtractor()
+tesseract_search = TesseractConfigSearch()
+ocr_processor = OCRProcessor(tesseract_search=tesseract_search)
+table_extractor = TableExtractor(tesseract_search=tesseract_search)
 document_classifier = DocumentClassifier()
 data_redactor = DataRedactor()
 kv_extractor = KeyValueExtractor()
@@ -133,21 +136,30 @@ async def process_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
+    raster_cache = PageRasterCache(document.file_path)
     try:
         document.status = "processing"
         db.commit()
         
-        ocr_result = ocr_processor.process_document(document.file_path)
+        ocr_result = ocr_processor.process_document(
+            document.file_path, raster_cache=raster_cache, document_type=document.document_type
+        )
         extracted_text = ocr_result['text']
         bounding_boxes = ocr_result['bounding_boxes']
         
         classification = document_classifier.classify_document(extracted_text)
+        if ocr_result.get('tesseract_config_accepted'):
+            tesseract_search.record_winner('ocr', classification['type'], ocr_result['tesseract_config'])
         
-        tables = table_extractor.extract_tables(document.file_path)
+        table_result = table_extractor.extract_tables_with_metadata(
+            document.file_path, raster_cache=raster_cache, document_type=classification['type'],
+            ocr_result=ocr_result
+        )
+        tables = table_result['tables']
         
         kv_pairs = kv_extractor.extract_key_value_pairs(extracted_text, bounding_boxes)
         
-        layout = ocr_processor.extract_layout_elements(document.file_path)
+        layout = ocr_processor.extract_layout_elements(ocr_result)
         
         document.extracted_text = extracted_text
         document.document_type = classification['type']
@@ -158,6 +170,7 @@ async def process_document(
         document.extracted_data = {
             'classification': classification,
             'layout': layout,
+            'table_extraction': table_result['metadata'],
             'processing_time': datetime.utcnow().isoformat()
         }
         document.status = "completed"
@@ -199,6 +212,9 @@ async def process_document(
         db.commit()
         
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    
+    finally:
+        raster_cache.close()
 
 @app.post("/redact/{document_id}")
 async def redact_document(
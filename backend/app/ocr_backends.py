@@ -0,0 +1,129 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Engine for this deployment; every backend returns EasyOCR readtext(detail=1) style results
+DEFAULT_OCR_BACKEND = os.environ.get('OCR_BACKEND', 'easyocr')
+# A deployment that names its engine must get that engine, not a silent fallback
+OCR_BACKEND_CONFIGURED = bool(os.environ.get('OCR_BACKEND'))
+# Tesseract names languages differently from EasyOCR
+TESSERACT_LANGUAGE_CODES = {'en': 'eng'}
+
+_backends: Dict[str, Callable] = {}
+
+
+def register_backend(name: str):
+    """Register a factory taking a language list and returning a readtext-compatible reader"""
+    def decorator(factory):
+        _backends[name] = factory
+        return factory
+    return decorator
+
+
+def available_backends() -> List[str]:
+    return sorted(_backends)
+
+
+def create_backend(name: str, languages: List[str]):
+    """Build the named reader; raises if the engine, its package or its models are unavailable"""
+    factory = _backends.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown OCR backend '{name}'; available: {', '.join(available_backends())}")
+    return factory(languages)
+
+
+def _box(x0: float, y0: float, x1: float, y1: float) -> List[List[float]]:
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+class ReadtextBackend(ABC):
+    """Base for non-EasyOCR engines: readtext returns [(4-point bbox, text, confidence 0-1)]"""
+
+    @abstractmethod
+    def readtext(self, image: np.ndarray, detail: int = 1, **kwargs) -> List:
+        ...
+
+    def readtext_batched(self, images: List[np.ndarray], detail: int = 1, **kwargs) -> List[List]:
+        return [self.readtext(image, detail=detail, **kwargs) for image in images]
+
+
+@register_backend('easyocr')
+def _easyocr_backend(languages: List[str]):
+    import easyocr
+
+    # quantize=True is EasyOCR's default (int8 dynamic quantization of the CPU recognizer), spelled out here
+    return easyocr.Reader(languages, gpu=False, download_enabled=True, quantize=True)
+
+
+@register_backend('rapidocr')
+class RapidOCRBackend(ReadtextBackend):
+    """PaddleOCR detection and recognition models on ONNX Runtime, via rapidocr_onnxruntime.
+
+    OCR_DET_MODEL / OCR_REC_MODEL point it at other model files, e.g. int8
+    quantized exports.
+    """
+
+    def __init__(self, languages: List[str]):
+        try:
+            from rapidocr_onnxruntime import RapidOCR
+        except ImportError as e:
+            raise ImportError("The rapidocr backend needs rapidocr_onnxruntime (see requirements.txt)") from e
+
+        if any(language != 'en' for language in languages):
+            logger.warning(f"RapidOCR default models are Chinese/English; ignoring languages {languages}")
+
+        model_paths = {
+            key: os.environ[env]
+            for key, env in (('det_model_path', 'OCR_DET_MODEL'), ('rec_model_path', 'OCR_REC_MODEL'))
+            if os.environ.get(env)
+        }
+        self.engine = RapidOCR(**model_paths)
+
+    def readtext(self, image: np.ndarray, detail: int = 1, **kwargs) -> List:
+        result, _ = self.engine(image)
+        return [
+            ([[float(x), float(y)] for x, y in box], text, float(score))
+            for box, text, score in result or []
+        ]
+
+    def recognize(self, image: np.ndarray, horizontal_list=None, free_list=None, detail: int = 1, **kwargs) -> List:
+        """Recognition only, on [x_min, x_max, y_min, y_max] boxes, like EasyOCR's recognize"""
+        results = []
+        for x_min, x_max, y_min, y_max in horizontal_list or []:
+            crop = np.ascontiguousarray(image[y_min:y_max, x_min:x_max])
+            if crop.size == 0:
+                continue
+            result, _ = self.engine(crop, use_det=False, use_cls=False, use_rec=True)
+            for item in result or []:
+                # Recognition-only results are [text, score]
+                results.append((_box(x_min, y_min, x_max, y_max), item[-2], float(item[-1])))
+        return results
+
+
+@register_backend('tesseract')
+class TesseractBackend(ReadtextBackend):
+    """Tesseract word boxes through pytesseract.image_to_data"""
+
+    def __init__(self, languages: List[str]):
+        import pytesseract
+
+        pytesseract.get_tesseract_version()
+        self.pytesseract = pytesseract
+        self.language = '+'.join(TESSERACT_LANGUAGE_CODES.get(language, language) for language in languages)
+
+    def readtext(self, image: np.ndarray, detail: int = 1, **kwargs) -> List:
+        data = self.pytesseract.image_to_data(
+            image, lang=self.language, config=r'--oem 3 --psm 3', output_type=self.pytesseract.Output.DICT
+        )
+        results = []
+        for text, conf, left, top, width, height in zip(
+            data['text'], data['conf'], data['left'], data['top'], data['width'], data['height']
+        ):
+            if text.strip() and float(conf) >= 0:
+                results.append((_box(left, top, left + width, top + height), text, float(conf) / 100))
+        return results
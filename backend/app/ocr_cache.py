@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = 'ocr_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Eviction trims the cache to this share of max_bytes, so the next few writes don't trigger it again
+EVICT_TO_FRACTION = 0.9
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def pdf_page_fingerprint(doc, page) -> str:
+    """Hash of what a PDF page draws: its content streams, the images it uses, its size and rotation.
+
+    Unchanged pages of a re-saved or revised document hash the same even
+    though the file as a whole does not.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b'')
+    return digest.hexdigest()
+
+
+def array_fingerprint(image: np.ndarray) -> str:
+    digest = hashlib.sha256(str(image.shape).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def _to_builtin(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OCRResultCache:
+    """On-disk OCR result cache keyed by file content, engine and config version.
+
+    Entries are JSON files; the least recently used ones (by mtime, bumped on
+    every hit) are evicted once the directory grows past max_bytes. The
+    directory is only scanned on the first write and when eviction runs;
+    in between, writes keep a running total.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self._lock = threading.Lock()
+        # Bytes of entries on disk; None until the first write scans the directory
+        self._size = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, engine: str, config_version: str) -> str:
+        file_hash = self.file_digest(file_path)
+        return hashlib.sha256(f"{file_hash}:{engine}:{config_version}".encode()).hexdigest()
+
+    def make_page_key(self, fingerprint: str, engine: str, config_version: str) -> str:
+        # No page number in the key, so a page still hits after pages are inserted or removed before it
+        return hashlib.sha256(f"page:{fingerprint}:{engine}:{config_version}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+            os.utime(path, None)
+        except (FileNotFoundError, ValueError):
+            return None
+        return result
+
+    def get(self, key: str) -> Optional[Dict]:
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def get_page(self, key: str) -> Optional[Dict]:
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.page_misses += 1
+            else:
+                self.page_hits += 1
+        return result
+
+    def put(self, key: str, result: Dict):
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f, default=_to_builtin)
+            added = os.path.getsize(tmp_path)
+            try:
+                added -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to write OCR cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._size is not None:
+                self._size += added
+            needs_scan = self._size is None or self._size > self.max_bytes
+        if needs_scan:
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total_size = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total_size += stat.st_size
+
+            if total_size > self.max_bytes:
+                target = self.max_bytes * EVICT_TO_FRACTION
+                entries.sort()
+                for _, size, name in entries:
+                    if total_size <= target:
+                        break
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                        total_size -= size
+                    except FileNotFoundError:
+                        continue
+
+            self._size = total_size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            page_lookups = self.page_hits + self.page_misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'page_hits': self.page_hits,
+                'page_misses': self.page_misses,
+                'page_hit_ratio': self.page_hits / page_lookups if page_lookups else 0.0
+            }
+
+
+class PageCacheSession:
+    """Page-level cache lookups for one document run.
+
+    Remembers the key of every page it looked up, so results for the pages
+    that missed can be stored once they have been recognized.
+    """
+
+    def __init__(self, cache: OCRResultCache, engine: str, config_version: str):
+        self.cache = cache
+        self.engine = engine
+        self.config_version = config_version
+        self.keys = {}
+        self.hits = 0
+
+    def lookup(self, page_num: int, fingerprint: str) -> Optional[Dict]:
+        key = self.cache.make_page_key(fingerprint, self.engine, self.config_version)
+        self.keys[page_num] = key
+        result = self.cache.get_page(key)
+        if result is None:
+            return None
+
+        self.hits += 1
+        # The page may have moved since it was cached
+        result['page'] = page_num
+        for box in result.get('bounding_boxes', []) + result.get('line_boxes', []):
+            box['page'] = page_num
+        result['page_cache_hit'] = True
+        # Timings and tier counts belong to the run that produced the entry, not this one
+        result.pop('seconds', None)
+        result.pop('ocr_tiers', None)
+        return result
+
+    def store(self, page_result: Dict):
+        key = self.keys.get(page_result.get('page'))
+        if key is None or page_result.get('page_cache_hit'):
+            return
+        # Incomplete or fast-only pages are recognized again next time rather than cached
+        if (page_result.get('partial') or page_result.get('error') or page_result.get('mode') == 'fast_only' or
+                page_result.get('skipped') == 'time_budget'):
+            return
+        # An empty page is only trusted when the blank check said so; otherwise something probably failed
+        if not page_result.get('word_count') and page_result.get('skipped') != 'blank':
+            return
+        self.cache.put(key, page_result)
+
+    def stats(self) -> Dict:
+        lookups = len(self.keys)
+        return {
+            'lookups': lookups,
+            'hits': self.hits,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
@@ -1,27 +1,160 @@
 import fitz
-import easyocr
 import cv2
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 import logging
 import os
-import io
-from typing import Dict, List, Tuple
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import re
 
+from escalation import DEFAULT_ESCALATION_CONFIDENCE, MIN_CONFIDENCE, merge_tier_stats, new_tier_stats, summarize_tiers
+from ocr_backends import DEFAULT_OCR_BACKEND, OCR_BACKEND_CONFIGURED, create_backend
+from ocr_cache import OCRResultCache, PageCacheSession, array_fingerprint, pdf_page_fingerprint
+from ocr_worker import (
+    TILE_WIDTH_THS, _init_page_worker, _ocr_batch_worker, _ocr_tile_worker, _readtext_tiered, _recognize_batch
+)
+from preprocessing import normalize_steps, preprocess
+from page_analysis import (
+    PROBE_ZOOM, TEXT_PROBE_ZOOM, choose_zoom, downsample_for_probe, estimate_text_height,
+    is_blank_page, score_page_content
+)
+from raster import (
+    DEFAULT_CACHE_ZOOM, ImageRegions, PageRasterCache, check_whole_decode, open_large_image, render_page
+)
+from roi import crop_field, field_rect, normalize_fields, words_in_rect
+from tesseract_pool import run_tesseract_line
+from tesseract_search import TesseractConfigSearch, word_score
+from tiling import cut_by_tile_edge, dedupe_boxes, offset_bbox, plan_tiles, reading_order
+from worker_pool import CPU_BUDGET, abandon, cpu_budget, submit_budgeted
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change would alter OCR output for the same input, so cached results are not reused
+OCR_CONFIG_VERSION = '9'
+OCR_LANGUAGES = ['en']
+# Render zoom for scanned PDF pages when adaptive zoom is off or the text size probe finds no glyphs
+PDF_RENDER_ZOOM = 2.0
+# Median glyph height (px) EasyOCR reads reliably; 10-11pt body text reaches it at about 2x
+OCR_TARGET_TEXT_HEIGHT = 14
+MIN_RENDER_ZOOM = 1.0
+MAX_RENDER_ZOOM = DEFAULT_CACHE_ZOOM
+DEFAULT_OCR_WORKERS = max(1, min(4, CPU_BUDGET))
+DEFAULT_OCR_BATCH_SIZE = 4
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+TESSERACT_CONFIGS = [
+    r'--oem 3 --psm 6',
+    r'--oem 3 --psm 4',
+    r'--oem 3 --psm 3',
+    r'--oem 1 --psm 6'
+]
+# Images above this many pixels are OCR'd in overlapping tiles
+DEFAULT_MAX_IMAGE_PIXELS = 20_000_000
+DEFAULT_TILE_SIZE = 2048
+# Must exceed the widest word and tallest line expected, so each appears whole in some tile
+DEFAULT_TILE_OVERLAP = 512
+DEFAULT_TILE_MEMORY_LIMIT = 1024 * 1024 * 1024
+# Rough EasyOCR working memory per input pixel, used to turn the memory limit into tiles in flight
+TILE_BYTES_PER_PIXEL = 64
+# Word count at which a Tesseract fallback run is accepted without waiting for the other configs
+TESSERACT_QUALITY_THRESHOLD = 20
+# Seconds one page may take before it is reported partial, and a whole document before remaining pages are skipped
+DEFAULT_PAGE_TIMEOUT = 120.0
+DEFAULT_DOCUMENT_TIMEOUT = 900.0
+# Once this share of the document budget is spent, new pages get the fast pass only, with no escalation
+FAST_ONLY_BUDGET_FRACTION = 0.5
+
+
+def _polygon(x0: float, y0: float, x1: float, y1: float) -> List[List[float]]:
+    # Same corner order EasyOCR uses: top-left, top-right, bottom-right, bottom-left
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _text_layer_boxes(words: List[Tuple], page_num: int) -> Tuple[List[Dict], List[Dict]]:
+    """Word and line boxes from page.get_text("words"), in PDF points (zoom 1.0)"""
+    word_boxes = []
+    lines = {}
+
+    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
+        if not word.strip():
+            continue
+        word_boxes.append({
+            'text': word,
+            'bbox': _polygon(x0, y0, x1, y1),
+            'confidence': 1.0,
+            'page': page_num,
+            'zoom': 1.0
+        })
+        line = lines.setdefault((block_no, line_no), {'words': [], 'rect': [x0, y0, x1, y1]})
+        line['words'].append(word)
+        rect = line['rect']
+        line['rect'] = [min(rect[0], x0), min(rect[1], y0), max(rect[2], x1), max(rect[3], y1)]
+
+    line_boxes = [
+        {
+            'text': ' '.join(line['words']),
+            'bbox': _polygon(*line['rect']),
+            'confidence': 1.0,
+            'page': page_num,
+            'zoom': 1.0
+        }
+        for line in lines.values()
+    ]
+
+    return word_boxes, line_boxes
+
+
 class OCRProcessor:
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, max_pages: Optional[int] = None,
+                 cache: Optional[OCRResultCache] = None, batch_size: int = DEFAULT_OCR_BATCH_SIZE,
+                 tesseract_search: Optional[TesseractConfigSearch] = None, skip_blank_pages: bool = True,
+                 max_image_pixels: int = DEFAULT_MAX_IMAGE_PIXELS, tile_size: int = DEFAULT_TILE_SIZE,
+                 tile_overlap: int = DEFAULT_TILE_OVERLAP, tile_memory_limit: int = DEFAULT_TILE_MEMORY_LIMIT,
+                 adaptive_zoom: bool = True, escalation_confidence: float = DEFAULT_ESCALATION_CONFIDENCE,
+                 page_timeout: Optional[float] = DEFAULT_PAGE_TIMEOUT,
+                 document_timeout: Optional[float] = DEFAULT_DOCUMENT_TIMEOUT, backend: Optional[str] = None):
         self.reader = None
         self.tesseract_available = False
+        # max_workers <= 1 keeps page OCR in-process; max_pages caps pages OCR'd per document
+        self.max_workers = DEFAULT_OCR_WORKERS if max_workers is None else max(1, max_workers)
+        # Torch threads per pool worker; each batch in flight holds this many CPU budget slots
+        self.torch_threads = max(1, CPU_BUDGET // self.max_workers)
+        self.max_pages = max_pages
+        # Pages per batched recognition call; also the recognizer's crop batch size
+        self.batch_size = max(1, batch_size)
+        self.skip_blank_pages = skip_blank_pages
+        # Render each scanned PDF page just large enough for its text instead of at a fixed zoom
+        self.adaptive_zoom = adaptive_zoom
+        # Fast-pass regions read below this confidence are re-read by slower tiers; <= MIN_CONFIDENCE disables
+        self.escalation_confidence = escalation_confidence
+        # Time budgets in seconds; None means unlimited
+        self.page_timeout = page_timeout
+        self.document_timeout = document_timeout
+        # Tier counters across every document OCR'd by this processor, for monitoring
+        self._tier_totals = new_tier_stats()
+        self.max_image_pixels = max_image_pixels
+        self.tile_size = tile_size
+        self.tile_overlap = min(tile_overlap, tile_size // 2)
+        # Caps decode memory plus tiles being recognized at once for large images
+        self.tile_memory_limit = tile_memory_limit
+        self._page_pool = None
+        self.cache = cache
+        self.tesseract_search = tesseract_search or TesseractConfigSearch()
+        # Registered readtext engine name (see ocr_backends); OCR_BACKEND picks it per deployment
+        self.backend = backend or DEFAULT_OCR_BACKEND
         
         try:
-            self.reader = easyocr.Reader(['en'], gpu=False, download_enabled=True)
-            logger.info("Enhanced EasyOCR initialized successfully")
+            self.reader = create_backend(self.backend, OCR_LANGUAGES)
+            logger.info(f"{self.backend} OCR backend initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize EasyOCR: {e}")
+            # Only the default engine may fall back to Tesseract; one asked for by name has to work
+            if backend or OCR_BACKEND_CONFIGURED:
+                raise RuntimeError(f"Configured OCR backend {self.backend} failed to initialize: {e}") from e
+            logger.error(f"Failed to initialize {self.backend} OCR backend: {e}")
 
         try:
             import pytesseract
@@ -31,93 +164,181 @@ class OCRProcessor:
         except:
             logger.info("Tesseract not available")
 
-    def process_document(self, file_path: str) -> Dict:
+    def process_document(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                         document_type: Optional[str] = None, preprocessing: Optional[List[str]] = None) -> Dict:
+        """OCR a PDF, TIFF or image; preprocessing is a template's extraction_rules.preprocessing list"""
         if not os.path.exists(file_path):
             return {'text': '', 'bounding_boxes': [], 'word_count': 0}
 
+        steps = normalize_steps(preprocessing)
+        cache_key = None
+        page_cache = self._page_cache_session(steps)
+        if self.cache is not None:
+            try:
+                cache_key = self.cache.make_key(
+                    file_path, self.engine_name(), f"{self._config_version()}:pre={'+'.join(steps)}"
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"OCR cache hit for {file_path}")
+                    cached['cache_hit'] = True
+                    return cached
+            except Exception as e:
+                logger.error(f"OCR cache lookup failed: {e}")
+
         file_ext = os.path.splitext(file_path)[1].lower()
+        started = time.perf_counter()
         
         try:
             if file_ext == '.pdf':
-                return self._process_pdf(file_path)
+                result = self._process_pdf(file_path, raster_cache, steps, page_cache)
+            elif file_ext in TIFF_EXTENSIONS and self._tiff_frame_count(file_path) > 1:
+                result = self._process_tiff(file_path, steps, page_cache)
             else:
-                return self._process_image(file_path)
+                result = self._process_image(file_path, document_type, steps)
         except Exception as e:
             logger.error(f"Document processing failed: {e}")
             return {'text': f'Error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
 
-    def _process_image(self, file_path: str) -> Dict:
+        result['preprocessing'] = list(steps)
+        if page_cache is not None and page_cache.keys:
+            result['page_cache'] = page_cache.stats()
+        result['timings'] = dict(
+            result.get('timings', {}),
+            elapsed_seconds=round(time.perf_counter() - started, 3),
+            page_timeout=self.page_timeout,
+            document_timeout=self.document_timeout
+        )
+        cut_short = result.get('partial_pages') or any(
+            skipped['reason'] == 'time_budget' for skipped in result.get('skipped_pages', [])
+        )
+        if cut_short:
+            logger.warning(f"OCR of {file_path} ran out of time budget; result is incomplete")
+
+        # Only complete, successful runs are cached; failures and time-outs should be retried on the next upload
+        if cache_key is not None and result.get('word_count', 0) > 0 and not cut_short and not result.get('partial'):
+            self.cache.put(cache_key, result)
+
+        if result.get('ocr_escalation'):
+            merge_tier_stats(self._tier_totals, result['ocr_escalation']['tiers'])
+
+        result['cache_hit'] = False
+        return result
+
+    def _page_cache_session(self, preprocessing: Tuple[str, ...]) -> Optional[PageCacheSession]:
+        if self.cache is None:
+            return None
+        return PageCacheSession(
+            self.cache, self.engine_name(), f"{self._config_version()}:pre={'+'.join(preprocessing)}"
+        )
+
+    def _store_pages(self, page_results: Iterator[Dict], page_cache: Optional[PageCacheSession]) -> Iterator[Dict]:
+        for page_result in page_results:
+            if page_cache is not None:
+                try:
+                    page_cache.store(page_result)
+                except Exception as e:
+                    logger.error(f"Page cache write failed for page {page_result.get('page')}: {e}")
+            yield page_result
+
+    def escalation_stats(self) -> Dict:
+        return summarize_tiers(self._tier_totals, self.escalation_confidence)
+
+    def engine_name(self) -> str:
+        if self.reader:
+            return self.backend
+        elif self.tesseract_available:
+            return 'tesseract'
+        return 'none'
+
+    def _config_version(self) -> str:
+        return (f"{OCR_CONFIG_VERSION}:zoom={PDF_RENDER_ZOOM}:max_pages={self.max_pages}"
+                f":skip_blank={self.skip_blank_pages}"
+                f":adaptive_zoom={self.adaptive_zoom}/{OCR_TARGET_TEXT_HEIGHT}/{MIN_RENDER_ZOOM}-{MAX_RENDER_ZOOM}"
+                f":tiles={self.max_image_pixels}/{self.tile_size}/{self.tile_overlap}"
+                f":escalate_below={self.escalation_confidence}")
+
+    def _process_image(self, file_path: str, document_type: Optional[str] = None,
+                       preprocessing: Tuple[str, ...] = ()) -> Dict:
         try:
-            pil_image = Image.open(file_path)
+            pil_image = open_large_image(file_path)
+            
+            # Large scans are read tile by tile straight from the file; decoding them whole is what tiling avoids
+            if self.reader and pil_image.width * pil_image.height > self.max_image_pixels:
+                pil_image.close()
+                return self._process_large_image(file_path, preprocessing)
+            check_whole_decode(pil_image)
+            
+            # Cleaned once here and shared by whichever engine path runs below
+            cleaned = None
+            deskewed_pages = []
+            if preprocessing:
+                cleaned, info = preprocess(np.array(pil_image.convert('L')), preprocessing)
+                if info['deskew_angle']:
+                    deskewed_pages.append({'page': 1, 'angle': info['deskew_angle']})
             
             if self.reader:
-                image_array = np.array(pil_image)
+                image_array = cleaned if cleaned is not None else np.array(pil_image)
                 
                 try:
-                    results = self.reader.readtext(image_array, detail=1, paragraph=False)
+                    started = time.perf_counter()
+                    results, tier_stats = _readtext_tiered(
+                        self.reader, self.tesseract_available, image_array, 0.5, self.escalation_confidence,
+                        self.page_timeout
+                    )
+                    timed_out = self.page_timeout is not None and time.perf_counter() - started > self.page_timeout
                     
                     if results:
                         text_parts = []
                         bounding_boxes = []
                         
-                        for result in results:
-                            if len(result) >= 3 and result[2] > 0.3:
-                                bbox, text, confidence = result[:3]
-                                if text and text.strip():
-                                    text_parts.append(text.strip())
-                                    bounding_boxes.append({
-                                        'text': text.strip(),
-                                        'bbox': bbox,
-                                        'confidence': confidence
-                                    })
+                        for bbox, text, confidence in results:
+                            text_parts.append(text.strip())
+                            bounding_boxes.append({
+                                'text': text.strip(),
+                                'bbox': bbox,
+                                'confidence': confidence
+                            })
                         
                         final_text = ' '.join(text_parts)
                         word_count = len(final_text.split()) if final_text else 0
                         
                         if word_count > 0:
-                            return {
+                            result = {
                                 'text': final_text,
                                 'bounding_boxes': bounding_boxes,
                                 'word_count': word_count,
-                                'pages_processed': 1
+                                'pages_processed': 1,
+                                'deskewed_pages': deskewed_pages,
+                                'ocr_escalation': summarize_tiers(tier_stats, self.escalation_confidence)
                             }
+                            # Weak regions left at their fast-pass reading; not cached, so a later upload retries
+                            if timed_out:
+                                result['partial'] = 'page_timeout'
+                            return result
                 
                 except Exception as e:
                     logger.error(f"EasyOCR failed: {e}")
             
             if self.tesseract_available:
                 try:
-                    import pytesseract
-                    image_array = np.array(pil_image)
-                    
-                    configs = [
-                        r'--oem 3 --psm 6',
-                        r'--oem 3 --psm 4',
-                        r'--oem 3 --psm 3',
-                        r'--oem 1 --psm 6'
-                    ]
+                    image_array = cleaned if cleaned is not None else np.array(pil_image)
                     
-                    best_text = ""
-                    best_word_count = 0
-                    
-                    for config in configs:
-                        try:
-                            text = pytesseract.image_to_string(image_array, config=config)
-                            if text:
-                                text = text.strip()
-                                word_count = len(text.split())
-                                if word_count > best_word_count:
-                                    best_text = text
-                                    best_word_count = word_count
-                        except:
-                            continue
+                    best_text, best_config = self.tesseract_search.search(
+                        image_array, TESSERACT_CONFIGS, 'ocr', document_type,
+                        threshold=TESSERACT_QUALITY_THRESHOLD
+                    )
+                    best_word_count = len(best_text.split())
                     
                     if best_word_count > 0:
                         return {
                             'text': best_text,
                             'bounding_boxes': [],
                             'word_count': best_word_count,
-                            'pages_processed': 1
+                            'pages_processed': 1,
+                            'tesseract_config': best_config,
+                            # Only a config that cleared the threshold should be remembered for the document's type
+                            'tesseract_config_accepted': word_score(best_text) >= TESSERACT_QUALITY_THRESHOLD
                         }
                 
                 except Exception as e:
@@ -129,82 +350,722 @@ class OCRProcessor:
             logger.error(f"Image processing error: {e}")
             return {'text': f'Image error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
 
-    def _process_pdf(self, file_path: str) -> Dict:
-        full_text = []
-        all_bounding_boxes = []
-        total_words = 0
+    def _get_page_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 1:
+            return None
+
+        if self._page_pool is None:
+            # spawn rather than fork: forking after torch has started its thread pools can deadlock
+            self._page_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_page_worker,
+                initargs=(OCR_LANGUAGES, self.torch_threads, self.backend)
+            )
+            logger.info(f"Started page OCR pool with {self.max_workers} workers")
+
+        return self._page_pool
+
+    def close(self):
+        self.tesseract_search.close()
+        if self._page_pool is not None:
+            self._page_pool.shutdown(wait=True, cancel_futures=True)
+            self._page_pool = None
+
+    def _process_large_image(self, file_path: str, preprocessing: Tuple[str, ...] = (), frame: int = 0,
+                             time_left: Optional[Callable[[], Optional[float]]] = None) -> Dict:
+        try:
+            regions = ImageRegions(file_path, frame=frame)
+        except Exception as e:
+            logger.error(f"Could not open large image: {e}")
+            return {'text': f'Image error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
         
         try:
+            return self._ocr_tiles(regions, preprocessing, time_left or self._document_clock())
+        except Exception as e:
+            logger.error(f"Tiled EasyOCR failed: {e}")
+            return {'text': f'Image error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
+        finally:
+            regions.close()
+
+    def _ocr_tiles(self, regions: ImageRegions, preprocessing: Tuple[str, ...],
+                   time_left: Callable[[], Optional[float]]) -> Dict:
+        # Whatever the decoder holds counts against the memory limit; inference gets the rest, a tile at a time
+        width, height = regions.width, regions.height
+        tiles = plan_tiles(width, height, self.tile_size, self.tile_overlap)
+        tile_bytes = self.tile_size * self.tile_size * TILE_BYTES_PER_PIXEL
+        decode_bytes = regions.resident_bytes(self.tile_size)
+        if decode_bytes + tile_bytes > self.tile_memory_limit:
+            raise MemoryError(
+                f"{width}x{height} {regions.mode} {regions.format} needs {decode_bytes >> 20} MB to decode, "
+                f"over the {self.tile_memory_limit >> 20} MB tile memory limit"
+            )
+        max_in_flight = min((self.tile_memory_limit - decode_bytes) // tile_bytes, self.max_workers)
+        logger.info(f"OCR'ing {width}x{height} image in {len(tiles)} tiles, "
+                    f"{'banded' if regions.banded else 'whole'} decode of {decode_bytes >> 20} MB")
+        
+        # Deskew rotates about the image centre, so per-tile angles would scatter the tiles' boxes
+        tile_steps = tuple(step for step in preprocessing if step != 'deskew')
+        if len(tile_steps) < len(preprocessing):
+            logger.info("Deskew is not applied to tiled images")
+        
+        pool = self._get_page_pool()
+        pending = deque()
+        boxes = []
+        tier_stats = new_tier_stats()
+        tiles_done = 0
+        
+        def collect(tile, tiered):
+            results, stats = tiered
+            merge_tier_stats(tier_stats, stats)
+            x, y, _, _ = tile
+            for bbox, text, confidence in results:
+                if confidence <= MIN_CONFIDENCE or not text.strip():
+                    continue
+                if cut_by_tile_edge(bbox, tile, width, height, self.tile_overlap):
+                    continue
+                boxes.append({
+                    'text': text.strip(),
+                    'bbox': offset_bbox(bbox, x, y),
+                    'confidence': confidence
+                })
+        
+        for tile in tiles:
+            if self._out_of_time(time_left):
+                logger.error(f"Time budget spent after {tiles_done} of {len(tiles)} tiles")
+                break
+            tile_array = regions.read(tile)
+            if tile_steps:
+                tile_array, _ = preprocess(tile_array, tile_steps)
+            
+            if pool is None:
+                collect(tile, _readtext_tiered(
+                    self.reader, self.tesseract_available, tile_array, TILE_WIDTH_THS, self.escalation_confidence
+                ))
+                tiles_done += 1
+                continue
+            
+            future = submit_budgeted(pool, _ocr_tile_worker, tile_array, self.escalation_confidence,
+                                     weight=self.torch_threads, timeout=time_left())
+            if future is None:
+                logger.error(f"No CPU budget freed up within the time budget after {tiles_done} of {len(tiles)} tiles")
+                break
+            tiles_done += 1
+            pending.append((tile, future))
+            while len(pending) >= max_in_flight:
+                done_tile, future = pending.popleft()
+                try:
+                    collect(done_tile, future.result())
+                except Exception as e:
+                    logger.error(f"Tile {done_tile} OCR failed: {e}")
+        
+        while pending:
+            done_tile, future = pending.popleft()
+            try:
+                collect(done_tile, future.result())
+            except Exception as e:
+                logger.error(f"Tile {done_tile} OCR failed: {e}")
+        
+        bounding_boxes = reading_order(dedupe_boxes(boxes))
+        final_text = ' '.join(box['text'] for box in bounding_boxes)
+        
+        result = {
+            'text': final_text,
+            'bounding_boxes': bounding_boxes,
+            'word_count': len(final_text.split()) if final_text else 0,
+            'pages_processed': 1,
+            'tiles_processed': tiles_done,
+            'deskewed_pages': [],
+            'ocr_escalation': summarize_tiers(tier_stats, self.escalation_confidence)
+        }
+        if tiles_done < len(tiles):
+            result['partial'] = 'time_budget'
+        return result
+
+    def iter_pages(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                   preprocessing: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yield per-page OCR results in page order as soon as each page is done"""
+        if not os.path.exists(file_path):
+            return
+
+        steps = normalize_steps(preprocessing)
+        page_cache = self._page_cache_session(steps)
+
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        if file_ext == '.pdf':
             doc = fitz.open(file_path)
+            try:
+                page_count = self._page_count(len(doc))
+                time_left = self._document_clock()
+                yield from self._store_pages(self._iter_recognized_pages(
+                    self._pdf_page_items(doc, page_count, raster_cache, page_cache, time_left), page_count, steps,
+                    time_left
+                ), page_cache)
+            finally:
+                doc.close()
+            return
+
+        if file_ext in TIFF_EXTENSIONS and self._tiff_frame_count(file_path) > 1:
+            with open_large_image(file_path) as tiff:
+                page_count = self._page_count(getattr(tiff, 'n_frames', 1))
+                time_left = self._document_clock()
+                yield from self._store_pages(self._iter_recognized_pages(
+                    self._tiff_page_items(tiff, page_count, page_cache, steps, time_left), page_count, steps,
+                    time_left
+                ), page_cache)
+            return
+
+        result = self._process_image(file_path, preprocessing=steps)
+        yield {
+            'page': 1,
+            'text': result.get('text', ''),
+            'bounding_boxes': result.get('bounding_boxes', []),
+            'word_count': result.get('word_count', 0)
+        }
+
+    def _document_clock(self) -> Callable[[], Optional[float]]:
+        """Seconds left of the document time budget counted from now, as a callable; None means unlimited"""
+        started = time.perf_counter()
+        
+        def time_left():
+            if self.document_timeout is None:
+                return None
+            return max(0.0, self.document_timeout - (time.perf_counter() - started))
+        return time_left
+
+    @staticmethod
+    def _out_of_time(time_left: Optional[Callable[[], Optional[float]]]) -> bool:
+        left = time_left() if time_left is not None else None
+        return left is not None and left <= 0
+
+    def _page_count(self, total_pages: int) -> int:
+        page_count = total_pages if self.max_pages is None else min(total_pages, self.max_pages)
+        
+        if page_count < total_pages:
+            logger.info(f"Page limit reached: processing {page_count} of {total_pages} pages")
+        
+        return page_count
+
+    def _iter_recognized_pages(self, page_items: Iterator[Tuple], page_count: int,
+                               preprocessing: Tuple[str, ...] = (),
+                               time_left: Optional[Callable[[], Optional[float]]] = None) -> Iterator[Dict]:
+        """Run page items through batched, pooled OCR and yield results in page order.
+
+        Each item is (page_num, result, image, zoom): pages that need no OCR
+        come with a result, pages that do come with an image. Pages that run
+        past the page budget come back partial; once the document budget is
+        spent, pages not yet sent for OCR are skipped. time_left is the
+        document clock shared with the item generator, which should stop
+        rendering once it runs out.
+        """
+        pool = self._get_page_pool()
+        # Bound rasterized batches held in memory while the workers catch up
+        max_in_flight = self.max_workers * 2
+        pending = deque()
+        batch = []
+        # Finished pages wait here until every earlier page is done, so output stays in page order
+        ready = {}
+        next_page = 1
+        remaining = time_left or self._document_clock()
+        
+        def empty_result(page_num):
+            return {'page': page_num, 'text': '', 'bounding_boxes': [], 'word_count': 0}
+        
+        def budget_spent(fraction=1.0):
+            left = remaining()
+            return left is not None and left <= self.document_timeout * (1 - fraction)
+        
+        def collect(future, page_nums, fast_only):
+            # A stuck worker can't be interrupted, so its pages are given up on and the document moves on
+            timeout = remaining()
+            if self.page_timeout is not None:
+                page_budget = self.page_timeout * len(page_nums)
+                timeout = page_budget if timeout is None else min(timeout, page_budget)
+            try:
+                for page_result in future.result(timeout=timeout):
+                    if fast_only:
+                        page_result['mode'] = 'fast_only'
+                    ready[page_result['page']] = page_result
+            except FutureTimeoutError:
+                abandon(future)
+                logger.error(f"OCR for pages {page_nums} ran past its time budget")
+                for page_num in page_nums:
+                    ready[page_num] = dict(empty_result(page_num), partial='page_timeout')
+            except Exception as e:
+                logger.error(f"OCR failed for pages {page_nums}: {e}")
+                for page_num in page_nums:
+                    ready[page_num] = dict(empty_result(page_num), error='ocr_failed')
+        
+        def flush():
+            if not batch:
+                return
+            pages = list(batch)
+            batch.clear()
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                page_text = page.get_text()
+            fast_only = budget_spent(FAST_ONLY_BUDGET_FRACTION)
+            escalate_below = 0.0 if fast_only else self.escalation_confidence
+            
+            if pool is None:
+                for page_result in _recognize_batch(
+                    self.reader, self.tesseract_available, pages, self.batch_size, escalate_below,
+                    preprocessing, self.page_timeout
+                ):
+                    if fast_only:
+                        page_result['mode'] = 'fast_only'
+                    ready[page_result['page']] = page_result
+                return
+            
+            page_nums = [num for num, _, _ in pages]
+            # When the budget is full, finish (or time out and let go of) our own oldest batch before waiting on others
+            while pending and not cpu_budget.has_room(self.torch_threads):
+                collect(*pending.popleft())
+            future = submit_budgeted(
+                pool, _ocr_batch_worker, pages, self.batch_size, escalate_below, preprocessing, self.page_timeout,
+                weight=self.torch_threads, timeout=remaining()
+            )
+            if future is None:
+                logger.error(f"No CPU budget freed up for pages {page_nums} within the time budget")
+                for page_num in page_nums:
+                    ready[page_num] = self._skipped_result(page_num, 'time_budget')
+                return
+            pending.append((future, page_nums, fast_only))
+            while len(pending) >= max_in_flight:
+                collect(*pending.popleft())
+        
+        try:
+            for page_num, page_result, image_array, zoom in page_items:
+                if page_result is not None:
+                    ready[page_num] = page_result
+                elif image_array is None:
+                    ready[page_num] = dict(empty_result(page_num), error='no_image')
+                elif budget_spent():
+                    ready[page_num] = self._skipped_result(page_num, 'time_budget')
+                else:
+                    # Batched detection needs equally sized inputs, so a page size change closes the batch
+                    if batch and batch[0][1].shape != image_array.shape:
+                        flush()
+                    batch.append((page_num, image_array, zoom))
+                    if len(batch) >= self.batch_size:
+                        flush()
                 
-                if page_text.strip() and len(page_text.split()) > 3:
-                    full_text.append(f"\n=== PAGE {page_num + 1} ===\n")
-                    full_text.append(page_text)
-                    total_words += len(page_text.split())
+                # Pick up whatever the workers have finished without blocking
+                while pending and pending[0][0].done():
+                    collect(*pending.popleft())
+                while next_page in ready:
+                    yield ready.pop(next_page)
+                    next_page += 1
+            
+            flush()
+            while next_page <= page_count:
+                if next_page not in ready and pending:
+                    collect(*pending.popleft())
+                    continue
+                yield ready.pop(next_page, None) or empty_result(next_page)
+                next_page += 1
+        finally:
+            for future, _, _ in pending:
+                future.cancel()
+
+    def _pdf_page_items(self, doc, page_count: int, raster_cache: Optional[PageRasterCache],
+                        page_cache: Optional[PageCacheSession] = None,
+                        time_left: Optional[Callable[[], Optional[float]]] = None) -> Iterator[Tuple]:
+        for page_index in range(page_count):
+            page_num = page_index + 1
+            page = doc.load_page(page_index)
+            
+            # One text page parse serves both the plain text and the word boxes
+            textpage = page.get_textpage()
+            page_text = page.get_text(textpage=textpage)
+            
+            if page_text.strip() and len(page_text.split()) > 3:
+                word_boxes, line_boxes = _text_layer_boxes(page.get_text("words", textpage=textpage), page_num)
+                yield page_num, {
+                    'page': page_num,
+                    'text': page_text,
+                    'bounding_boxes': word_boxes,
+                    'line_boxes': line_boxes,
+                    'word_count': len(page_text.split())
+                }, None, None
+                continue
+            
+            # Pages unchanged since an earlier upload reuse that upload's OCR
+            if page_cache is not None:
+                cached = self._cached_page(page_cache, page_num, lambda: pdf_page_fingerprint(doc, page))
+                if cached is not None:
+                    yield page_num, cached, None, None
+                    continue
+
+            # Once the document budget is spent, pages that would need rendering are skipped without it
+            if self._out_of_time(time_left):
+                yield page_num, self._skipped_result(page_num, 'time_budget'), None, None
+                continue
+
+            # With adaptive zoom one 72 dpi probe serves both the blank check and the text size estimate
+            text_probe = self._text_probe(page, page_num) if self.adaptive_zoom else None
+            if text_probe is not None:
+                make_probe = lambda: downsample_for_probe(text_probe)
+            else:
+                make_probe = lambda: render_page(page, PROBE_ZOOM)
+            
+            if self.skip_blank_pages and self._is_blank(make_probe, page_num):
+                yield page_num, self._blank_result(page_num), None, None
+                continue
+            
+            zoom = self._render_zoom(text_probe, page_num)
+            try:
+                if raster_cache is not None:
+                    image_array = raster_cache.get_page(page_index, zoom)
                 else:
-                    try:
-                        mat = fitz.Matrix(2.0, 2.0)
-                        pix = page.get_pixmap(matrix=mat, alpha=False)
-                        img_data = pix.tobytes("png")
-                        
-                        pil_image = Image.open(io.BytesIO(img_data))
-                        image_array = np.array(pil_image)
-                        
-                        if self.reader:
-                            try:
-                                results = self.reader.readtext(image_array, detail=1)
-                                if results:
-                                    text_parts = []
-                                    for result in results:
-                                        if len(result) >= 3 and result[2] > 0.3:
-                                            text_parts.append(result[1].strip())
-                                    
-                                    if text_parts:
-                                        ocr_text = ' '.join(text_parts)
-                                        full_text.append(f"\n=== PAGE {page_num + 1} ===\n")
-                                        full_text.append(ocr_text)
-                                        total_words += len(ocr_text.split())
-                            except:
-                                pass
-                        
-                        elif self.tesseract_available:
-                            try:
-                                import pytesseract
-                                text = pytesseract.image_to_string(image_array, config=r'--oem 3 --psm 6')
-                                if text.strip():
-                                    full_text.append(f"\n=== PAGE {page_num + 1} ===\n")
-                                    full_text.append(text.strip())
-                                    total_words += len(text.split())
-                            except:
-                                pass
-                    
-                    except Exception as e:
-                        logger.error(f"Page {page_num + 1} OCR failed: {e}")
+                    image_array = render_page(page, zoom)
+            except Exception as e:
+                logger.error(f"Page {page_num} render failed: {e}")
+                image_array = None
+            
+            yield page_num, None, image_array, zoom
 
-            doc.close()
+    def _tiff_page_items(self, tiff, page_count: int, page_cache: Optional[PageCacheSession] = None,
+                         preprocessing: Tuple[str, ...] = (),
+                         time_left: Optional[Callable[[], Optional[float]]] = None) -> Iterator[Tuple]:
+        # Frames are decoded one at a time as the iterator advances; only in-flight batches stay in memory
+        for frame_index in range(page_count):
+            page_num = frame_index + 1
+            if self._out_of_time(time_left):
+                yield page_num, self._skipped_result(page_num, 'time_budget'), None, None
+                continue
+            try:
+                tiff.seek(frame_index)
+                # Large-format frames are OCR'd tile by tile like large single images, never decoded whole
+                if self.reader and tiff.width * tiff.height > self.max_image_pixels:
+                    yield page_num, self._large_frame_result(
+                        tiff.filename, frame_index, preprocessing, time_left
+                    ), None, None
+                    continue
+                check_whole_decode(tiff)
+                frame = np.array(tiff.convert('L'))
+            except Exception as e:
+                logger.error(f"TIFF frame {page_num} decode failed: {e}")
+                yield page_num, None, None, None
+                continue
             
-            final_text = ''.join(full_text)
+            if page_cache is not None:
+                cached = self._cached_page(page_cache, page_num, lambda: array_fingerprint(frame))
+                if cached is not None:
+                    yield page_num, cached, None, None
+                    continue
+
+            if self.skip_blank_pages and self._is_blank(lambda: downsample_for_probe(frame), page_num):
+                yield page_num, self._blank_result(page_num), None, None
+                continue
             
-            return {
-                'text': final_text,
-                'bounding_boxes': all_bounding_boxes,
-                'word_count': total_words,
-                'pages_processed': len(doc)
+            # Frame pixels are the native coordinate space, so boxes carry zoom 1.0
+            yield page_num, None, frame, 1.0
+
+    def _large_frame_result(self, file_path: str, frame_index: int, preprocessing: Tuple[str, ...],
+                            time_left: Optional[Callable[[], Optional[float]]] = None) -> Dict:
+        page_num = frame_index + 1
+        result = self._process_large_image(file_path, preprocessing, frame_index, time_left)
+        if 'tiles_processed' not in result:
+            return {'page': page_num, 'text': '', 'bounding_boxes': [], 'word_count': 0, 'error': 'ocr_failed'}
+        
+        page_result = {
+            'page': page_num,
+            'text': result['text'],
+            # Tile boxes are in the frame's own pixels
+            'bounding_boxes': [dict(box, page=page_num, zoom=1.0) for box in result['bounding_boxes']],
+            'word_count': result['word_count'],
+            'render_zoom': 1.0,
+            'tiles_processed': result['tiles_processed'],
+            'ocr_tiers': result['ocr_escalation']['tiers']
+        }
+        if result.get('partial'):
+            page_result['partial'] = result['partial']
+        return page_result
+
+    def _text_probe(self, page, page_num: int) -> Optional[np.ndarray]:
+        try:
+            return render_page(page, TEXT_PROBE_ZOOM)
+        except Exception as e:
+            logger.error(f"Text size probe render failed on page {page_num}: {e}")
+            return None
+
+    def _render_zoom(self, text_probe: Optional[np.ndarray], page_num: int) -> float:
+        if text_probe is None:
+            return PDF_RENDER_ZOOM
+        try:
+            zoom = choose_zoom(
+                estimate_text_height(text_probe), TEXT_PROBE_ZOOM, OCR_TARGET_TEXT_HEIGHT,
+                MIN_RENDER_ZOOM, MAX_RENDER_ZOOM, PDF_RENDER_ZOOM
+            )
+            logger.info(f"Page {page_num} render zoom {zoom}")
+            return zoom
+        except Exception as e:
+            logger.error(f"Text size estimate failed on page {page_num}: {e}")
+            return PDF_RENDER_ZOOM
+
+    def _cached_page(self, page_cache: PageCacheSession, page_num: int,
+                     make_fingerprint: Callable[[], str]) -> Optional[Dict]:
+        try:
+            return page_cache.lookup(page_num, make_fingerprint())
+        except Exception as e:
+            logger.error(f"Page cache lookup failed on page {page_num}: {e}")
+            return None
+
+    def _tiff_frame_count(self, file_path: str) -> int:
+        try:
+            with open_large_image(file_path) as tiff:
+                return getattr(tiff, 'n_frames', 1)
+        except Exception as e:
+            logger.error(f"Could not read TIFF frame count: {e}")
+            return 1
+
+    def _is_blank(self, make_probe: Callable[[], np.ndarray], page_num: int) -> bool:
+        # A thumbnail is enough to tell separator sheets and empty backs from real content
+        try:
+            if is_blank_page(score_page_content(make_probe())):
+                logger.info(f"Page {page_num} is blank, skipping OCR")
+                return True
+        except Exception as e:
+            logger.error(f"Blank check failed on page {page_num}: {e}")
+        return False
+
+    def _blank_result(self, page_num: int) -> Dict:
+        return self._skipped_result(page_num, 'blank')
+
+    def _skipped_result(self, page_num: int, reason: str) -> Dict:
+        return {
+            'page': page_num,
+            'text': '',
+            'bounding_boxes': [],
+            'word_count': 0,
+            'skipped': reason
+        }
+
+    def _process_pdf(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                     preprocessing: Tuple[str, ...] = (), page_cache: Optional[PageCacheSession] = None) -> Dict:
+        try:
+            doc = fitz.open(file_path)
+            total_pages = len(doc)
+            page_count = self._page_count(total_pages)
+            time_left = self._document_clock()
+            
+            page_results = {
+                page_result['page']: page_result
+                for page_result in self._store_pages(self._iter_recognized_pages(
+                    self._pdf_page_items(doc, page_count, raster_cache, page_cache, time_left), page_count,
+                    preprocessing, time_left
+                ), page_cache)
             }
+
+            doc.close()
+            
+            return self._assemble_pages(page_results, page_count, total_pages)
             
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
             return {'text': f'PDF error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
 
-    def extract_layout_elements(self, file_path: str) -> Dict:
+    def _process_tiff(self, file_path: str, preprocessing: Tuple[str, ...] = (),
+                      page_cache: Optional[PageCacheSession] = None) -> Dict:
+        try:
+            with open_large_image(file_path) as tiff:
+                total_pages = getattr(tiff, 'n_frames', 1)
+                page_count = self._page_count(total_pages)
+                time_left = self._document_clock()
+                
+                page_results = {
+                    page_result['page']: page_result
+                    for page_result in self._store_pages(self._iter_recognized_pages(
+                        self._tiff_page_items(tiff, page_count, page_cache, preprocessing, time_left), page_count,
+                        preprocessing, time_left
+                    ), page_cache)
+                }
+            
+            return self._assemble_pages(page_results, page_count, total_pages)
+            
+        except Exception as e:
+            logger.error(f"TIFF processing failed: {e}")
+            return {'text': f'TIFF error: {str(e)}', 'bounding_boxes': [], 'word_count': 0}
+
+    def _assemble_pages(self, page_results: Dict[int, Dict], page_count: int, total_pages: int) -> Dict:
+        full_text = []
+        all_bounding_boxes = []
+        all_line_boxes = []
+        skipped_pages = []
+        render_zooms = []
+        deskewed_pages = []
+        partial_pages = []
+        fast_only_pages = []
+        page_seconds = []
+        tier_stats = new_tier_stats()
+        total_words = 0
+        tiles_processed = 0
+        
+        for page_num in sorted(page_results):
+            page_result = page_results[page_num]
+            if page_result.get('partial'):
+                partial_pages.append({'page': page_num, 'reason': page_result['partial']})
+            if page_result.get('mode') == 'fast_only':
+                fast_only_pages.append(page_num)
+            if page_result.get('seconds') is not None:
+                page_seconds.append({'page': page_num, 'seconds': page_result['seconds']})
+            if page_result.get('ocr_tiers'):
+                merge_tier_stats(tier_stats, page_result['ocr_tiers'])
+            tiles_processed += page_result.get('tiles_processed') or 0
+            if page_result.get('render_zoom') is not None:
+                render_zooms.append({'page': page_num, 'zoom': page_result['render_zoom']})
+            if (page_result.get('preprocessing') or {}).get('deskew_angle'):
+                deskewed_pages.append({'page': page_num, 'angle': page_result['preprocessing']['deskew_angle']})
+            if page_result.get('skipped'):
+                skipped_pages.append({'page': page_num, 'reason': page_result['skipped']})
+            if not page_result['text'].strip():
+                continue
+            
+            full_text.append(f"\n=== PAGE {page_num} ===\n")
+            full_text.append(page_result['text'])
+            all_bounding_boxes.extend(page_result['bounding_boxes'])
+            all_line_boxes.extend(page_result.get('line_boxes', []))
+            total_words += page_result['word_count']
+        
+        result = {
+            'text': ''.join(full_text),
+            'bounding_boxes': all_bounding_boxes,
+            'line_boxes': all_line_boxes,
+            'word_count': total_words,
+            'pages_processed': page_count,
+            'total_pages': total_pages,
+            'skipped_pages': skipped_pages,
+            'blank_pages_skipped': sum(1 for skipped in skipped_pages if skipped['reason'] == 'blank'),
+            'render_zooms': render_zooms,
+            # Boxes on these pages are in the deskewed frame, not the page's own
+            'deskewed_pages': deskewed_pages,
+            'ocr_escalation': summarize_tiers(tier_stats, self.escalation_confidence),
+            'partial_pages': partial_pages,
+            'timings': {'page_seconds': page_seconds, 'fast_only_pages': fast_only_pages}
+        }
+        if tiles_processed:
+            result['tiles_processed'] = tiles_processed
+        return result
+
+    def extract_fields(self, file_path: str, fields, preprocessing: Optional[List[str]] = None) -> Dict:
+        """Read only a template's field regions instead of OCR'ing whole pages.
+
+        Text-layer PDF pages are read straight from the text layer; other
+        pages are rendered once and each field crop is recognized on its own.
+        """
+        regions = normalize_fields(fields)
+        steps = normalize_steps(preprocessing)
+        field_results = {}
+        pages_rendered = 0
+        
+        if not regions or not os.path.exists(file_path):
+            return self._field_result(field_results, regions, pages_rendered)
+        
+        by_page = {}
+        for region in regions:
+            by_page.setdefault(region['page'], []).append(region)
+        
+        try:
+            if os.path.splitext(file_path)[1].lower() == '.pdf':
+                doc = fitz.open(file_path)
+                try:
+                    for page_num, page_regions in sorted(by_page.items()):
+                        if page_num > len(doc):
+                            logger.warning(f"Template field page {page_num} is past the end of the document")
+                            continue
+                        page = doc.load_page(page_num - 1)
+                        
+                        words = page.get_text("words")
+                        if len(words) > 3:
+                            for region in page_regions:
+                                value = words_in_rect(words, field_rect(region['bbox'], page.rect.width, page.rect.height))
+                                field_results[region['name']] = self._field_value(
+                                    region, value, 1.0 if value else 0.0, 'text_layer'
+                                )
+                            continue
+                        
+                        pages_rendered += 1
+                        self._read_field_regions(render_page(page, PDF_RENDER_ZOOM), page_regions, steps, field_results)
+                finally:
+                    doc.close()
+            else:
+                with Image.open(file_path) as image:
+                    frame_count = getattr(image, 'n_frames', 1)
+                    for page_num, page_regions in sorted(by_page.items()):
+                        if page_num > frame_count:
+                            logger.warning(f"Template field page {page_num} is past the last image frame")
+                            continue
+                        image.seek(page_num - 1)
+                        pages_rendered += 1
+                        self._read_field_regions(np.array(image.convert('L')), page_regions, steps, field_results)
+        except Exception as e:
+            logger.error(f"Template field OCR failed: {e}")
+        
+        return self._field_result(field_results, regions, pages_rendered)
+
+    def _read_field_regions(self, image_array: np.ndarray, regions: List[Dict], preprocessing: Tuple[str, ...],
+                            field_results: Dict):
+        # Preprocessing runs once on the page, not per crop, so deskew sees whole lines of text
+        if preprocessing:
+            image_array, _ = preprocess(image_array, preprocessing)
+        
+        for region in regions:
+            text, confidence = self._recognize_region(crop_field(image_array, region['bbox']))
+            field_results[region['name']] = self._field_value(region, text, confidence, 'ocr')
+
+    def _recognize_region(self, crop: np.ndarray) -> Tuple[str, float]:
+        if crop.size == 0:
+            return '', 0.0
+        
+        if self.reader:
+            try:
+                results, _ = _readtext_tiered(
+                    self.reader, self.tesseract_available, crop, 0.5, self.escalation_confidence
+                )
+                boxes = reading_order([
+                    {'bbox': bbox, 'text': text.strip(), 'confidence': confidence}
+                    for bbox, text, confidence in results
+                ])
+                if not boxes:
+                    return '', 0.0
+                return ' '.join(box['text'] for box in boxes), float(np.mean([box['confidence'] for box in boxes]))
+            except Exception as e:
+                logger.error(f"EasyOCR failed on template field: {e}")
+        
+        elif self.tesseract_available:
+            try:
+                return run_tesseract_line(crop)
+            except Exception as e:
+                logger.error(f"Tesseract failed on template field: {e}")
+        
+        return '', 0.0
+
+    def _field_value(self, region: Dict, value: str, confidence: float, source: str) -> Dict:
+        return {
+            'value': value.strip(),
+            'confidence': round(float(confidence), 3),
+            'page': region['page'],
+            'bbox': region['bbox'],
+            'source': source
+        }
+
+    def _field_result(self, field_results: Dict[str, Dict], regions: List[Dict], pages_rendered: int) -> Dict:
+        key_value_pairs = {name: result['value'] for name, result in field_results.items() if result['value']}
+        text = '\n'.join(f"{name}: {value}" for name, value in key_value_pairs.items())
+        return {
+            'fields': field_results,
+            'key_value_pairs': key_value_pairs,
+            'text': text,
+            'word_count': len(text.split()) if text else 0,
+            'regions_processed': len(field_results),
+            'pages_rendered': pages_rendered,
+            'missing_fields': [region['name'] for region in regions if region['name'] not in key_value_pairs]
+        }
+
+    def extract_layout_elements(self, ocr_result: Dict) -> Dict:
+        # Works from an OCR result the caller already has; never re-reads or re-OCRs the file
         try:
-            result = self.process_document(file_path)
-            text = result.get('text', '')
+            text = ocr_result.get('text', '')
             
             if not text:
                 return {'headers': [], 'paragraphs': [], 'lists': [], 'tables': []}
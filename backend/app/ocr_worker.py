@@ -0,0 +1,206 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from escalation import (
+    DEFAULT_ESCALATION_CONFIDENCE, MIN_CONFIDENCE, TIER_FAST, escalate_regions, new_tier_stats
+)
+from ocr_backends import DEFAULT_OCR_BACKEND, create_backend
+from preprocessing import preprocess
+from tesseract_pool import run_tesseract
+
+# Imported by every spawned OCR worker, so it must stay free of import-time side effects
+logger = logging.getLogger(__name__)
+
+# Low horizontal merge threshold keeps tile boxes word-sized so tile edges rarely split them
+TILE_WIDTH_THS = 0.1
+
+# Per-process state for page-sharded OCR; populated by _init_page_worker
+_worker_reader = None
+_worker_tesseract_available = False
+
+
+def _init_page_worker(languages: List[str], torch_threads: int, backend: str = DEFAULT_OCR_BACKEND):
+    global _worker_reader, _worker_tesseract_available
+
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+
+    try:
+        _worker_reader = create_backend(backend, languages)
+    except Exception as e:
+        logger.error(f"OCR worker {os.getpid()} failed to initialize {backend}: {e}")
+
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        _worker_tesseract_available = True
+    except Exception:
+        pass
+
+
+def _ocr_batch_worker(pages: List[Tuple[int, np.ndarray, float]], batch_size: int, escalate_below: float,
+                      preprocessing: Tuple[str, ...], page_timeout: Optional[float]) -> List[Dict]:
+    return _recognize_batch(
+        _worker_reader, _worker_tesseract_available, pages, batch_size, escalate_below, preprocessing, page_timeout
+    )
+
+
+def _ocr_tile_worker(image_array: np.ndarray, escalate_below: float) -> Tuple[List[Tuple], Dict]:
+    if not _worker_reader:
+        return [], new_tier_stats()
+    return _readtext_tiered(_worker_reader, _worker_tesseract_available, image_array, TILE_WIDTH_THS, escalate_below)
+
+
+def _readtext_raw(reader, image_array: np.ndarray, width_ths: float = 0.5) -> List[Tuple]:
+    results = reader.readtext(image_array, detail=1, paragraph=False, width_ths=width_ths)
+    return [
+        ([[int(x), int(y)] for x, y in bbox], text, float(confidence))
+        for bbox, text, confidence in (result[:3] for result in results or [] if len(result) >= 3)
+    ]
+
+
+def _readtext_tiered(reader, tesseract_available: bool, image_array: np.ndarray, width_ths: float,
+                     escalate_below: float, page_timeout: Optional[float] = None) -> Tuple[List[Tuple], Dict]:
+    """Fast EasyOCR pass over the whole image, then slower tiers on its weak regions until page_timeout runs out"""
+    stats = new_tier_stats()
+    started = time.perf_counter()
+    results = _readtext_raw(reader, image_array, width_ths)
+    stats[TIER_FAST]['seconds'] += time.perf_counter() - started
+    stats[TIER_FAST]['regions'] += len(results)
+    deadline = started + page_timeout if page_timeout is not None else None
+    return escalate_regions(reader, tesseract_available, image_array, results, escalate_below, stats, deadline), stats
+
+
+def _easyocr_page_result(page_num: int, results: List, zoom: float) -> Dict:
+    text_parts = []
+    bounding_boxes = []
+
+    for result in results or []:
+        if len(result) >= 3 and result[2] > MIN_CONFIDENCE:
+            bbox, part, confidence = result[:3]
+            if part and part.strip():
+                text_parts.append(part.strip())
+                bounding_boxes.append({
+                    'text': part.strip(),
+                    'bbox': [[int(x), int(y)] for x, y in bbox],
+                    'confidence': float(confidence),
+                    'page': page_num,
+                    'zoom': zoom
+                })
+
+    text = ' '.join(text_parts)
+    return {
+        'page': page_num,
+        'text': text,
+        'bounding_boxes': bounding_boxes,
+        'word_count': len(text.split()) if text else 0,
+        'render_zoom': zoom
+    }
+
+
+def _tiered_page_result(reader, tesseract_available: bool, page_num: int, image_array: np.ndarray,
+                        results: List, zoom: float, fast_seconds: float, escalate_below: float,
+                        page_timeout: Optional[float] = None) -> Dict:
+    stats = new_tier_stats()
+    stats[TIER_FAST]['seconds'] = fast_seconds
+    regions = [tuple(result[:3]) for result in results or [] if len(result) >= 3]
+    stats[TIER_FAST]['regions'] = len(regions)
+
+    # Escalation gets whatever is left of the page budget after the fast pass
+    started = time.perf_counter()
+    deadline = started + max(0.0, page_timeout - fast_seconds) if page_timeout is not None else None
+    merged = escalate_regions(reader, tesseract_available, image_array, regions, escalate_below, stats, deadline)
+    finished = time.perf_counter()
+
+    page_result = _easyocr_page_result(page_num, merged, zoom)
+    page_result['ocr_tiers'] = stats
+    page_result['seconds'] = round(fast_seconds + finished - started, 4)
+    if deadline is not None and finished > deadline:
+        page_result['partial'] = 'page_timeout'
+    return page_result
+
+
+def _recognize_batch(reader, tesseract_available: bool, pages: List[Tuple[int, np.ndarray, float]],
+                     batch_size: int, escalate_below: float = DEFAULT_ESCALATION_CONFIDENCE,
+                     preprocessing: Tuple[str, ...] = (), page_timeout: Optional[float] = None) -> List[Dict]:
+    """Preprocess then OCR same-sized (page_num, image, zoom) pages, reporting what preprocessing did per page"""
+    if not preprocessing:
+        return _recognize_pages(reader, tesseract_available, pages, batch_size, escalate_below, page_timeout)
+
+    cleaned = []
+    page_info = {}
+    for page_num, image_array, zoom in pages:
+        image_array, page_info[page_num] = preprocess(image_array, preprocessing)
+        cleaned.append((page_num, image_array, zoom))
+
+    page_results = _recognize_pages(reader, tesseract_available, cleaned, batch_size, escalate_below, page_timeout)
+    for page_result in page_results:
+        page_result['preprocessing'] = page_info.get(page_result['page'])
+    return page_results
+
+
+def _recognize_pages(reader, tesseract_available: bool, pages: List[Tuple[int, np.ndarray, float]],
+                     batch_size: int, escalate_below: float, page_timeout: Optional[float] = None) -> List[Dict]:
+    """OCR same-sized (page_num, image, zoom) pages in one batched EasyOCR call, falling back to page by page"""
+    if reader and len(pages) > 1:
+        try:
+            started = time.perf_counter()
+            batched = reader.readtext_batched([image for _, image, _ in pages], detail=1, batch_size=batch_size)
+            # The batch's fast-pass time is shared evenly between its pages
+            fast_seconds = (time.perf_counter() - started) / len(pages)
+            return [
+                _tiered_page_result(
+                    reader, tesseract_available, page_num, image_array, results, zoom, fast_seconds,
+                    escalate_below, page_timeout
+                )
+                for (page_num, image_array, zoom), results in zip(pages, batched)
+            ]
+        except Exception as e:
+            logger.error(f"Batched EasyOCR failed, retrying page by page: {e}")
+
+    return [
+        _recognize_page(
+            reader, tesseract_available, page_num, image_array, zoom, batch_size, escalate_below, page_timeout
+        )
+        for page_num, image_array, zoom in pages
+    ]
+
+
+def _recognize_page(reader, tesseract_available: bool, page_num: int, image_array: np.ndarray,
+                    zoom: float = 1.0, batch_size: int = 1,
+                    escalate_below: float = DEFAULT_ESCALATION_CONFIDENCE,
+                    page_timeout: Optional[float] = None) -> Dict:
+    """OCR a single rasterized page; page_num is 1-based"""
+    if reader:
+        try:
+            started = time.perf_counter()
+            results = reader.readtext(image_array, detail=1, batch_size=batch_size)
+            return _tiered_page_result(
+                reader, tesseract_available, page_num, image_array, results, zoom,
+                time.perf_counter() - started, escalate_below, page_timeout
+            )
+        except Exception as e:
+            logger.error(f"EasyOCR failed on page {page_num}: {e}")
+
+    elif tesseract_available:
+        try:
+            text = run_tesseract(image_array, r'--oem 3 --psm 6').strip()
+            return {
+                'page': page_num,
+                'text': text,
+                'bounding_boxes': [],
+                'word_count': len(text.split()) if text else 0,
+                'render_zoom': zoom
+            }
+        except Exception as e:
+            logger.error(f"Tesseract failed on page {page_num}: {e}")
+
+    # Marked so the page is not cached as genuinely empty and gets another try next time
+    return {'page': page_num, 'text': '', 'bounding_boxes': [], 'word_count': 0, 'error': 'ocr_failed'}
@@ -0,0 +1,144 @@
+import cv2
+import numpy as np
+from collections import Counter
+from typing import Dict, Optional
+
+# Zoom for cheap probe renders (72 dpi * 0.5 = 36 dpi, roughly 300x400 px for A4)
+PROBE_ZOOM = 0.5
+# Longest side for probes made from already-decoded images, matching a PROBE_ZOOM render
+PROBE_MAX_SIDE = 420
+# Scanner shadows and punch holes sit along the border, so the outer margin is ignored
+MARGIN_FRACTION = 0.05
+INK_LEVEL = 160
+EDGE_LEVEL = 40
+BLANK_INK_RATIO = 0.002
+BLANK_EDGE_RATIO = 0.002
+# Zoom for the text size probe; 72 dpi still resolves body-text glyphs as separate components
+TEXT_PROBE_ZOOM = 1.0
+MIN_GLYPHS = 20
+# Zooms are snapped to this step so similar pages render to the same size and still batch together
+ZOOM_STEP = 0.25
+# Ruling lines are at least this fraction of the page's shorter side long
+RULE_LENGTH_FRACTION = 0.05
+# Word gaps narrower than this many text heights are closed, so a line of prose becomes one blob
+WORD_GAP_HEIGHTS = 1.5
+# Column starts within this many text heights of each other count as aligned
+ALIGN_TOLERANCE_HEIGHTS = 1.5
+DEFAULT_TEXT_HEIGHT = 8.0
+MIN_TABLE_RULES = 2
+MIN_ALIGNED_ROWS = 3
+
+
+def downsample_for_probe(gray: np.ndarray) -> np.ndarray:
+    height, width = gray.shape[:2]
+    scale = PROBE_MAX_SIDE / max(height, width)
+    if scale >= 1:
+        return gray
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def score_page_content(gray: np.ndarray) -> Dict:
+    """Ink density and edge density of a low-resolution grayscale page"""
+    height, width = gray.shape[:2]
+    margin_y = int(height * MARGIN_FRACTION)
+    margin_x = int(width * MARGIN_FRACTION)
+    body = gray[margin_y:height - margin_y, margin_x:width - margin_x]
+
+    if body.size == 0:
+        return {'ink_ratio': 0.0, 'edge_ratio': 0.0}
+
+    body = body.astype(np.int16)
+    ink_ratio = float(np.count_nonzero(body < INK_LEVEL)) / body.size
+
+    horizontal = np.count_nonzero(np.abs(np.diff(body, axis=1)) > EDGE_LEVEL)
+    vertical = np.count_nonzero(np.abs(np.diff(body, axis=0)) > EDGE_LEVEL)
+    edge_ratio = float(horizontal + vertical) / (2 * body.size)
+
+    return {'ink_ratio': ink_ratio, 'edge_ratio': edge_ratio}
+
+
+def is_blank_page(scores: Dict) -> bool:
+    return scores['ink_ratio'] < BLANK_INK_RATIO and scores['edge_ratio'] < BLANK_EDGE_RATIO
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """Median glyph height in pixels, from connected components of the binarized page"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Drop specks, rules, images and runs of touching glyphs
+    glyphs = (heights >= 2) & (heights <= gray.shape[0] * 0.05) & (widths <= heights * 3)
+    if np.count_nonzero(glyphs) < MIN_GLYPHS:
+        return None
+
+    return float(np.median(heights[glyphs]))
+
+
+def choose_zoom(text_height: Optional[float], probe_zoom: float, target_height: float,
+                min_zoom: float, max_zoom: float, default_zoom: float) -> float:
+    """Smallest zoom that renders the probe's glyphs at roughly target_height pixels"""
+    if not text_height:
+        return default_zoom
+
+    zoom = target_height * probe_zoom / text_height
+    zoom = round(zoom / ZOOM_STEP) * ZOOM_STEP
+    return float(min(max_zoom, max(min_zoom, zoom)))
+
+
+def _count_runs(flags: np.ndarray) -> int:
+    return int(np.count_nonzero(np.diff(np.concatenate(([0], flags.astype(np.int8)))) == 1))
+
+
+def score_table_layout(gray: np.ndarray, text_height: Optional[float] = None) -> Dict:
+    """Ruling lines and column-aligned text in a low-resolution grayscale page or region.
+
+    h_rules / v_rules count distinct horizontal and vertical rules;
+    aligned_rows is the most text lines that start a column at the same x.
+    """
+    height, width = gray.shape[:2]
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+
+    rule_length = max(10, int(min(height, width) * RULE_LENGTH_FRACTION))
+    h_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (rule_length, 1)))
+    v_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, rule_length)))
+    h_rules = _count_runs(np.count_nonzero(h_lines, axis=1) >= rule_length)
+    v_rules = _count_runs(np.count_nonzero(v_lines, axis=0) >= rule_length)
+
+    # Close word gaps in the text left after removing the rules; what stays apart is a column gap
+    text_height = text_height or DEFAULT_TEXT_HEIGHT
+    text = cv2.bitwise_and(binary, cv2.bitwise_not(cv2.bitwise_or(h_lines, v_lines)))
+    gap = max(2, int(text_height * WORD_GAP_HEIGHTS))
+    blobs = cv2.dilate(text, cv2.getStructuringElement(cv2.MORPH_RECT, (gap, 1)))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(blobs, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    keep = (heights >= text_height * 0.5) & (heights <= text_height * 3)
+    boxes = stats[1:][keep]
+
+    lines = []
+    for x, y, w, h in sorted(boxes[:, :4].tolist(), key=lambda box: box[1] + box[3] / 2):
+        if lines and y + h / 2 <= lines[-1]['bottom']:
+            lines[-1]['starts'].append(x)
+        else:
+            lines.append({'bottom': y + h, 'starts': [x]})
+
+    # A line with several blobs has column gaps; count where each later column starts
+    tolerance = text_height * ALIGN_TOLERANCE_HEIGHTS
+    aligned = Counter()
+    for line in lines:
+        aligned.update({round(start / tolerance) for start in sorted(line['starts'])[1:]})
+
+    return {
+        'h_rules': h_rules,
+        'v_rules': v_rules,
+        'aligned_rows': max(aligned.values()) if aligned else 0
+    }
+
+
+def is_table_candidate(scores: Dict) -> bool:
+    ruled = scores['h_rules'] >= MIN_TABLE_RULES and scores['v_rules'] >= MIN_TABLE_RULES
+    return ruled or scores['aligned_rows'] >= MIN_ALIGNED_ROWS
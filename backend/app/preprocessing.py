@@ -0,0 +1,116 @@
+import logging
+from typing import Dict, Iterable, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Steps run in this order whatever order a template lists them in: geometry first, binarization last
+PIPELINE_ORDER = ('deskew', 'denoise', 'enhance_contrast', 'binarize')
+# Skew is estimated on a copy no longer than this on its longest side
+SKEW_PROBE_MAX_SIDE = 1000
+MAX_SKEW_DEGREES = 10.0
+# Smaller angles are left alone; rotating costs a resample for no gain
+MIN_SKEW_DEGREES = 0.3
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+BINARIZE_BLOCK_SIZE = 31
+BINARIZE_OFFSET = 15
+
+
+def to_gray(image_array: np.ndarray) -> np.ndarray:
+    if image_array.ndim == 2:
+        return image_array
+    if image_array.shape[2] == 4:
+        return cv2.cvtColor(image_array, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
+
+
+def normalize_steps(steps: Iterable[str]) -> Tuple[str, ...]:
+    """Known steps from a template's preprocessing list, in pipeline order"""
+    requested = set(steps or [])
+    unknown = requested.difference(PIPELINE_ORDER)
+    if unknown:
+        logger.warning(f"Ignoring unknown preprocessing steps: {sorted(unknown)}")
+    return tuple(step for step in PIPELINE_ORDER if step in requested)
+
+
+def _profile_sharpness(binary: np.ndarray, angle: float) -> float:
+    height, width = binary.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    rotated = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST)
+    # Text lines aligned with the rows give a spiky row profile
+    rows = rotated.sum(axis=1, dtype=np.float64)
+    return float(np.sum(np.diff(rows) ** 2))
+
+
+def estimate_skew(gray: np.ndarray) -> float:
+    """Rotation in degrees that best lines text up with the rows, by coarse then fine profile search"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, SKEW_PROBE_MAX_SIDE / max(height, width))
+    if scale < 1:
+        gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) < binary.size * 0.001:
+        return 0.0
+
+    coarse = np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 0.5, 1.0)
+    best = max(coarse, key=lambda angle: _profile_sharpness(binary, angle))
+    fine = np.arange(best - 1.0, best + 1.05, 0.1)
+    return round(float(max(fine, key=lambda angle: _profile_sharpness(binary, angle))), 2)
+
+
+def deskew(gray: np.ndarray) -> Tuple[np.ndarray, float]:
+    angle = estimate_skew(gray)
+    if abs(angle) < MIN_SKEW_DEGREES:
+        return gray, 0.0
+
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    # Same canvas size, so a deskewed page still batches with its unrotated neighbours
+    rotated = cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return rotated, round(angle, 2)
+
+
+def denoise(gray: np.ndarray) -> np.ndarray:
+    return cv2.medianBlur(gray, 3)
+
+
+def enhance_contrast(gray: np.ndarray) -> np.ndarray:
+    clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+    return clahe.apply(gray)
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    return cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, BINARIZE_BLOCK_SIZE, BINARIZE_OFFSET
+    )
+
+
+def preprocess(image_array: np.ndarray, steps: Tuple[str, ...]) -> Tuple[np.ndarray, Dict]:
+    """Run normalized preprocessing steps over a page, returning the cleaned gray image and what was done.
+
+    The input is never modified, so shared read-only renders are safe to pass in.
+    """
+    info = {'steps': [], 'deskew_angle': 0.0}
+    if not steps:
+        return image_array, info
+
+    gray = to_gray(image_array)
+    for step in steps:
+        try:
+            if step == 'deskew':
+                gray, info['deskew_angle'] = deskew(gray)
+            elif step == 'denoise':
+                gray = denoise(gray)
+            elif step == 'enhance_contrast':
+                gray = enhance_contrast(gray)
+            elif step == 'binarize':
+                gray = binarize(gray)
+            info['steps'].append(step)
+        except Exception as e:
+            logger.error(f"Preprocessing step {step} failed: {e}")
+
+    return gray, info
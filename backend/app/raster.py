@@ -0,0 +1,308 @@
+import fitz
+import cv2
+import numpy as np
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageFile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Highest zoom any stage renders PDF pages at (table extraction uses up to 3x, OCR 2x)
+DEFAULT_CACHE_ZOOM = 3.0
+# Table extraction wants 1.5x the detail OCR does, so first renders leave that much room
+DEFAULT_CACHE_HEADROOM = 1.5
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+# Pillow refuses to open images over twice MAX_IMAGE_PIXELS as decompression bombs, and its default
+# limit stops short of large-format scans (600 dpi A0 is ~560M px). Files read in bounded pieces are
+# opened through open_large_image, which lets them through up to this many pixels; every other open
+# keeps Pillow's own limit.
+MAX_DECODE_PIXELS = 1_000_000_000
+# Uncompressed images are decoded in bands of this many rows
+DEFAULT_BAND_ROWS = 256
+# Pillow 11+ wants decoder tiles as named tuples; the pinned 10.x takes plain ones
+_Tile = getattr(ImageFile, '_Tile', lambda *fields: tuple(fields))
+# Bits per pixel of the raw layouts a band can be addressed in directly
+RAW_MODE_BITS = {'1': 1, '1;I': 1, 'L': 8, 'L;I': 8, 'RGB': 24, 'BGR': 24, 'RGBX': 32, 'RGBA': 32, 'CMYK': 32}
+
+
+_open_limit_lock = threading.Lock()
+
+
+def open_large_image(file_path: str) -> Image.Image:
+    """Image.open for files that are read in bounded pieces (tiles, bands, frames), up to MAX_DECODE_PIXELS.
+
+    Pillow checks its process-wide limit only while opening, so the limit is
+    raised for the open alone. Opening reads just the header; callers check
+    the size before decoding, and check_whole_decode() before decoding whole.
+    """
+    with _open_limit_lock:
+        limit = Image.MAX_IMAGE_PIXELS
+        try:
+            if limit is not None:
+                Image.MAX_IMAGE_PIXELS = max(limit, MAX_DECODE_PIXELS)
+            image = Image.open(file_path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+    pixels = image.width * image.height
+    if limit is not None and pixels > max(limit, MAX_DECODE_PIXELS):
+        image.close()
+        raise Image.DecompressionBombError(f"Image size ({pixels} pixels) exceeds limit of {MAX_DECODE_PIXELS} pixels")
+    return image
+
+
+def check_whole_decode(image: Image.Image):
+    """Refuse to decode the current frame whole when Pillow's own limit would have refused to open it"""
+    limit = Image.MAX_IMAGE_PIXELS
+    pixels = image.width * image.height
+    if limit is not None and pixels > 2 * limit:
+        raise Image.DecompressionBombError(
+            f"Image size ({pixels} pixels) exceeds limit of {2 * limit} pixels for a whole decode"
+        )
+
+
+def pixmap_to_array(pix) -> np.ndarray:
+    """Wrap a pixmap's samples as a read-only (h, w) or (h, w, n) uint8 array"""
+    samples = np.frombuffer(pix.samples, dtype=np.uint8)
+    if pix.n == 1:
+        return samples.reshape(pix.height, pix.width)
+    return samples.reshape(pix.height, pix.width, pix.n)
+
+
+def render_page(page, zoom: float, gray: bool = True) -> np.ndarray:
+    # Both OCR and table detection work on grayscale, so render straight to it by default
+    colorspace = fitz.csGRAY if gray else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    return pixmap_to_array(pix)
+
+
+class ScratchBuffers:
+    """Per-thread scratch arrays reused across pages of the same size.
+
+    Only for intermediates that are fully consumed before the next page is
+    processed; anything handed on to another stage must own its memory.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+        return buffer
+
+
+class PageRasterCache:
+    """Renders each page of one PDF once and shares it between pipeline stages.
+
+    The first request for a page renders it in grayscale with headroom above
+    the requested zoom (capped at the cache zoom), so the more detailed stage
+    that follows can reuse it; smaller requests get downsampled copies. A
+    request beyond the cached render replaces it. Cached rasters are shared
+    and read-only. Call close() (or use as a context manager) when the
+    document is done.
+    """
+
+    def __init__(self, file_path: str, zoom: float = DEFAULT_CACHE_ZOOM,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES, headroom: float = DEFAULT_CACHE_HEADROOM):
+        self.file_path = file_path
+        self.zoom = zoom
+        self.headroom = headroom
+        self.max_bytes = max_bytes
+        self.renders = 0
+        self._doc = None
+        self._pages = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load_page(self, page_index: int):
+        if self._doc is None:
+            self._doc = fitz.open(self.file_path)
+        return self._doc.load_page(page_index)
+
+    def get_page(self, page_index: int, zoom: Optional[float] = None) -> np.ndarray:
+        zoom = self.zoom if zoom is None else zoom
+
+        with self._lock:
+            if zoom > self.zoom:
+                logger.warning(f"Zoom {zoom} exceeds raster cache zoom {self.zoom}; rendering uncached")
+                return render_page(self._load_page(page_index), zoom)
+
+            entry = self._pages.get(page_index)
+            if entry is None or entry[0] < zoom:
+                render_zoom = min(self.zoom, zoom * self.headroom)
+                entry = (render_zoom, render_page(self._load_page(page_index), render_zoom))
+                self.renders += 1
+                self._store(page_index, entry)
+            else:
+                self._pages.move_to_end(page_index)
+
+        cached_zoom, image = entry
+        if zoom == cached_zoom:
+            return image
+
+        scale = zoom / cached_zoom
+        height, width = image.shape[:2]
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def cached_zoom(self, page_index: int) -> Optional[float]:
+        """Zoom of the page's cached render, or None when it has none; never renders"""
+        with self._lock:
+            entry = self._pages.get(page_index)
+            return entry[0] if entry is not None else None
+
+    def _store(self, page_index: int, entry: Tuple[float, np.ndarray]):
+        replaced = self._pages.pop(page_index, None)
+        if replaced is not None:
+            self._size -= replaced[1].nbytes
+        self._pages[page_index] = entry
+        self._size += entry[1].nbytes
+
+        # Keep at least the newest page even if it alone exceeds the budget
+        while self._size > self.max_bytes and len(self._pages) > 1:
+            _, evicted = self._pages.popitem(last=False)
+            self._size -= evicted[1].nbytes
+
+    def close(self):
+        with self._lock:
+            self._pages.clear()
+            self._size = 0
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+
+
+
+def _decoded_pixel_bytes(mode: str) -> int:
+    # Pillow keeps 1 and 8-bit modes at a byte per pixel and pads wider ones to 4, except 16-bit gray
+    if mode in ('1', 'L', 'P'):
+        return 1
+    return 2 if mode.startswith('I;16') else 4
+
+
+def _band_tiles(tiles: List, band_rows: int) -> Optional[List[Tuple]]:
+    """The image's decoder tiles with uncompressed ones split into row bands; None when it only decodes whole"""
+    banded = []
+    for name, extents, offset, args in tiles:
+        raw_args = (args,) if isinstance(args, str) else tuple(args or ())
+        rawmode, stride, ystep = (raw_args + ('', 0, 1)[len(raw_args):])[:3]
+        x0, y0, x1, y1 = extents
+        if name != 'raw' or ystep != 1 or rawmode not in RAW_MODE_BITS:
+            banded.append(_Tile(name, extents, offset, args))
+            continue
+        stride = stride or ((x1 - x0) * RAW_MODE_BITS[rawmode] + 7) // 8
+        for y in range(y0, y1, band_rows):
+            extents = (x0, y, x1, min(y + band_rows, y1))
+            banded.append(_Tile('raw', extents, offset + (y - y0) * stride, (rawmode, stride, 1)))
+
+    return banded if len(banded) > 1 else None
+
+
+class ImageRegions:
+    """Grayscale regions of a large image file, decoding as little of it as the format allows.
+
+    Uncompressed and multi-tile images are decoded only across the tiles or
+    row bands a region touches. Single-stream codecs (most compressed TIFFs,
+    PNG) are decoded once in their own mode and cropped; JPEG is decoded
+    straight to grayscale. resident_bytes() is what the decoder holds
+    between reads, for callers budgeting memory. frame picks one page of a
+    multi-frame TIFF.
+    """
+
+    def __init__(self, file_path: str, band_rows: int = DEFAULT_BAND_ROWS, frame: int = 0):
+        self.file_path = file_path
+        self.frame = frame
+        with open_large_image(file_path) as image:
+            image.seek(frame)
+            self.width, self.height = image.size
+            self.mode = image.mode
+            self.format = image.format
+            self._tiles = _band_tiles(image.tile, band_rows)
+        self.band_rows = band_rows
+        self._whole = None
+        # Last decoded window as ((x0, y0, x1, y1), gray array); neighbouring tiles usually share it
+        self._window = None
+
+    @property
+    def banded(self) -> bool:
+        return self._tiles is not None
+
+    def resident_bytes(self, tile_size: int) -> int:
+        """Decode memory held while reading tile_size regions: a window of bands, or the whole image"""
+        if self.banded:
+            rows = min(self.height, tile_size + 2 * self.band_rows)
+            return self.width * rows * (_decoded_pixel_bytes(self.mode) + 1)
+        pixel_bytes = 1 if self.format == 'JPEG' else _decoded_pixel_bytes(self.mode)
+        return self.width * self.height * pixel_bytes
+
+    def read(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Region (x, y, w, h) as an owned 8-bit grayscale array"""
+        x, y, w, h = box
+        if not self.banded:
+            image = self._decode_whole()
+            return np.array(image.crop((x, y, x + w, y + h)).convert('L'))
+
+        tiles = [
+            tile for tile in self._tiles
+            if tile[1][0] < x + w and tile[1][2] > x and tile[1][1] < y + h and tile[1][3] > y
+        ]
+        window = (
+            min(tile[1][0] for tile in tiles), min(tile[1][1] for tile in tiles),
+            max(tile[1][2] for tile in tiles), max(tile[1][3] for tile in tiles)
+        )
+        if self._window is None or self._window[0] != window:
+            # Drop the old window first so two are never held at once
+            self._window = None
+            self._window = (window, self._decode_window(window, tiles))
+        wx, wy = window[:2]
+        return self._window[1][y - wy:y - wy + h, x - wx:x - wx + w].copy()
+
+    def _decode_window(self, window: Tuple[int, int, int, int], tiles: List[Tuple]) -> np.ndarray:
+        wx0, wy0, wx1, wy1 = window
+        with open_large_image(self.file_path) as image:
+            image.seek(self.frame)
+            # Decode into an image the size of the window, with each tile moved to its place in it.
+            # Pillow 11+'s TIFF plugin sizes its decode buffer from _tile_size rather than the image size;
+            # 10.x has no _tile_size and uses the image size.
+            image._size = (wx1 - wx0, wy1 - wy0)
+            if hasattr(image, '_tile_size'):
+                image._tile_size = image._size
+            image.tile = [
+                _Tile(name, (x0 - wx0, y0 - wy0, x1 - wx0, y1 - wy0), offset, args)
+                for name, (x0, y0, x1, y1), offset, args in tiles
+            ]
+            image.load()
+            return np.array(image.convert('L'))
+
+    def _decode_whole(self) -> Image.Image:
+        if self._whole is None:
+            image = open_large_image(self.file_path)
+            image.seek(self.frame)
+            if self.format == 'JPEG':
+                image.draft('L', image.size)
+            image.load()
+            self._whole = image
+        return self._whole
+
+    def close(self):
+        if self._whole is not None:
+            self._whole.close()
+            self._whole = None
+        self._window = None
@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Field boxes are drawn by hand; a little slack keeps descenders and first/last glyphs inside the crop
+FIELD_PADDING = 0.005
+
+
+def _region(field: Dict) -> Optional[List[float]]:
+    region = field.get('bbox', field.get('coordinates', field.get('region')))
+    if isinstance(region, dict):
+        try:
+            x, y = float(region['x']), float(region['y'])
+            region = [x, y, x + float(region['width']), y + float(region['height'])]
+        except (KeyError, TypeError, ValueError):
+            return None
+    if not isinstance(region, (list, tuple)) or len(region) != 4:
+        return None
+    try:
+        x0, y0, x1, y1 = (float(value) for value in region)
+    except (TypeError, ValueError):
+        return None
+    if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+        return None
+    return [x0, y0, x1, y1]
+
+
+def normalize_fields(fields) -> List[Dict]:
+    """Template fields that carry a region, as {'name', 'page', 'bbox'} dicts.
+
+    Fields may be a {name: definition} mapping or a list of definitions with
+    a 'name'. A region is [x0, y0, x1, y1] (or {x, y, width, height}) as
+    fractions of the page size, so it holds at any render resolution.
+    """
+    if isinstance(fields, dict):
+        definitions = [dict(definition, name=name) for name, definition in fields.items() if isinstance(definition, dict)]
+    elif isinstance(fields, list):
+        definitions = [definition for definition in fields if isinstance(definition, dict) and definition.get('name')]
+    else:
+        return []
+
+    regions = []
+    for definition in definitions:
+        bbox = _region(definition)
+        if bbox is None:
+            continue
+        try:
+            page = max(1, int(definition.get('page', 1)))
+        except (TypeError, ValueError):
+            page = 1
+        regions.append({'name': str(definition['name']), 'page': page, 'bbox': bbox})
+    return regions
+
+
+def has_regions(fields) -> bool:
+    return bool(normalize_fields(fields))
+
+
+def field_rect(bbox: List[float], width: float, height: float) -> Tuple[float, float, float, float]:
+    """Padded normalized bbox scaled to a width x height page, clamped to the page"""
+    x0, y0, x1, y1 = bbox
+    return (
+        max(0.0, (x0 - FIELD_PADDING) * width),
+        max(0.0, (y0 - FIELD_PADDING) * height),
+        min(float(width), (x1 + FIELD_PADDING) * width),
+        min(float(height), (y1 + FIELD_PADDING) * height)
+    )
+
+
+def crop_field(image_array: np.ndarray, bbox: List[float]) -> np.ndarray:
+    height, width = image_array.shape[:2]
+    x0, y0, x1, y1 = field_rect(bbox, width, height)
+    return np.ascontiguousarray(image_array[int(y0):int(np.ceil(y1)), int(x0):int(np.ceil(x1))])
+
+
+def words_in_rect(words: List[Tuple], rect: Tuple[float, float, float, float]) -> str:
+    """Text-layer words (page.get_text("words")) whose centre falls inside rect, in reading order"""
+    x0, y0, x1, y1 = rect
+    inside = [
+        word for word in words
+        if x0 <= (word[0] + word[2]) / 2 <= x1 and y0 <= (word[1] + word[3]) / 2 <= y1 and word[4].strip()
+    ]
+    inside.sort(key=lambda word: (word[5], word[6], word[0]))
+    return ' '.join(word[4] for word in inside)
@@ -0,0 +1,184 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A row or column of a line mask is a ruling line when it is set along this much of the table
+MIN_LINE_COVERAGE = 0.3
+# A boundary between two cells is drawn when a line covers this much of it; otherwise the cells merge
+MIN_SEPARATOR_COVERAGE = 0.6
+# Pixels either side of a line's centre searched for it
+LINE_BAND = 2
+# Ruling lines bleed a few pixels into a cell; ink checks ignore this margin
+CELL_MARGIN = 3
+# White padding around a cell crop before it is read
+CELL_BORDER = 10
+# An empty cell is only re-read when this much of its interior is ink
+MIN_CELL_INK = 0.01
+# Words further apart than this many line heights start a new column
+COLUMN_GAP_LINE_HEIGHTS = 1.0
+
+
+def page_words(ocr_result: Optional[Dict]) -> Dict[int, List[Dict]]:
+    """OCR word boxes grouped by page, as {'text', 'rect': (x0, y0, x1, y1)} at zoom 1.0.
+
+    Pages that OCR deskewed are left out: their boxes are in the rotated
+    frame and would not line up with an unrotated table render.
+    """
+    if not ocr_result:
+        return {}
+
+    deskewed = {entry['page'] for entry in ocr_result.get('deskewed_pages', [])}
+    words = {}
+    for box in ocr_result.get('bounding_boxes', []):
+        page_num = box.get('page', 1)
+        text = (box.get('text') or '').strip()
+        if page_num in deskewed or not text:
+            continue
+        try:
+            xs = [float(point[0]) for point in box['bbox']]
+            ys = [float(point[1]) for point in box['bbox']]
+        except (KeyError, TypeError, ValueError, IndexError):
+            continue
+        zoom = float(box.get('zoom') or 1.0)
+        words.setdefault(page_num, []).append({
+            'text': text,
+            'rect': (min(xs) / zoom, min(ys) / zoom, max(xs) / zoom, max(ys) / zoom)
+        })
+    return words
+
+
+def words_in_region(words: List[Dict], zoom: float, region: Tuple[int, int, int, int]) -> List[Dict]:
+    """Words whose centre is inside region (x, y, w, h at the table render), in region pixels"""
+    x, y, w, h = region
+    inside = []
+    for word in words:
+        x0, y0, x1, y1 = (value * zoom for value in word['rect'])
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        if x <= cx < x + w and y <= cy < y + h:
+            inside.append({'text': word['text'], 'rect': (x0 - x, y0 - y, x1 - x, y1 - y)})
+    return inside
+
+
+def _line_positions(projection: np.ndarray, length: int) -> np.ndarray:
+    """Centres of the runs of a mask projection that a ruling line covers enough of"""
+    covered = np.concatenate(([False], projection >= length * MIN_LINE_COVERAGE, [False]))
+    edges = np.flatnonzero(np.diff(covered.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    return ((starts + ends - 1) // 2).astype(int)
+
+
+def _drawn(mask_band: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """For each span between consecutive bounds, whether a line along mask_band covers most of it"""
+    cumulative = np.concatenate(([0], np.cumsum(mask_band > 0)))
+    lengths = np.maximum(np.diff(bounds), 1)
+    return (cumulative[bounds[1:]] - cumulative[bounds[:-1]]) / lengths >= MIN_SEPARATOR_COVERAGE
+
+
+def table_grid(h_lines: np.ndarray, v_lines: np.ndarray) -> Optional[Dict]:
+    """Cell structure of a ruled table from its horizontal and vertical line masks.
+
+    Row and column boundaries come from the masks' projections; a boundary
+    segment with no line drawn along it merges the cells on either side.
+    Returns {'rows', 'columns', 'cells': [{'row', 'col', 'row_span',
+    'col_span', 'bbox': (x, y, w, h)}]} in crop pixels, or None without a grid.
+    """
+    height, width = h_lines.shape[:2]
+    ys = _line_positions(np.count_nonzero(h_lines, axis=1), width)
+    xs = _line_positions(np.count_nonzero(v_lines, axis=0), height)
+    if len(ys) < 2 or len(xs) < 2:
+        return None
+    n_rows, n_cols = len(ys) - 1, len(xs) - 1
+
+    # separates_right[r, c]: a line is drawn between base cells (r, c) and (r, c + 1)
+    separates_right = np.ones((n_rows, max(n_cols - 1, 0)), dtype=bool)
+    for c, x in enumerate(xs[1:-1]):
+        band = v_lines[:, max(0, x - LINE_BAND):x + LINE_BAND + 1].max(axis=1)
+        separates_right[:, c] = _drawn(band, ys)
+    # separates_below[r, c]: a line is drawn between base cells (r, c) and (r + 1, c)
+    separates_below = np.ones((max(n_rows - 1, 0), n_cols), dtype=bool)
+    for r, y in enumerate(ys[1:-1]):
+        band = h_lines[max(0, y - LINE_BAND):y + LINE_BAND + 1, :].max(axis=0)
+        separates_below[r, :] = _drawn(band, xs)
+
+    owner = -np.ones((n_rows, n_cols), dtype=int)
+    cells = []
+    for r in range(n_rows):
+        for c in range(n_cols):
+            if owner[r, c] >= 0:
+                continue
+            col_end = c + 1
+            while col_end < n_cols and not separates_right[r, col_end - 1] and owner[r, col_end] < 0:
+                col_end += 1
+            row_end = r + 1
+            while row_end < n_rows and not separates_below[row_end - 1, c:col_end].any():
+                row_end += 1
+            owner[r:row_end, c:col_end] = len(cells)
+            x0, y0, x1, y1 = xs[c], ys[r], xs[col_end], ys[row_end]
+            cells.append({
+                'row': r, 'col': c, 'row_span': row_end - r, 'col_span': col_end - c,
+                'bbox': (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+            })
+    return {'rows': n_rows, 'columns': n_cols, 'cells': cells}
+
+
+def assign_words(cells: List[Dict], words: List[Dict]) -> List[str]:
+    """Text of each cell from the words whose centre falls inside it, in reading order"""
+    texts = [[] for _ in cells]
+    for word in words:
+        x0, y0, x1, y1 = word['rect']
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        for i, cell in enumerate(cells):
+            x, y, w, h = cell['bbox']
+            if x <= cx < x + w and y <= cy < y + h:
+                texts[i].append((round(y0), x0, word['text']))
+                break
+    return [' '.join(text for _, _, text in sorted(cell)) for cell in texts]
+
+
+def cell_matrix(grid: Dict, texts: List[str]) -> List[List[str]]:
+    """Row-major text matrix; a spanning cell's text sits in its top-left slot, the slots it covers stay empty"""
+    matrix = [[''] * grid['columns'] for _ in range(grid['rows'])]
+    for cell, text in zip(grid['cells'], texts):
+        matrix[cell['row']][cell['col']] = text
+    return matrix
+
+
+def has_ink(binary: np.ndarray, cell: Tuple[int, int, int, int]) -> bool:
+    x, y, w, h = cell
+    interior = binary[y + CELL_MARGIN:y + h - CELL_MARGIN, x + CELL_MARGIN:x + w - CELL_MARGIN]
+    return interior.size > 0 and np.count_nonzero(interior) >= interior.size * MIN_CELL_INK
+
+
+def cell_crop(gray: np.ndarray, cell: Tuple[int, int, int, int]) -> np.ndarray:
+    """Cell interior without its ruling lines, on a white border Tesseract can find the text edges against"""
+    x, y, w, h = cell
+    interior = gray[y + CELL_MARGIN:y + h - CELL_MARGIN, x + CELL_MARGIN:x + w - CELL_MARGIN]
+    return cv2.copyMakeBorder(interior, CELL_BORDER, CELL_BORDER, CELL_BORDER, CELL_BORDER,
+                              cv2.BORDER_CONSTANT, value=255)
+
+
+def text_lines(words: List[Dict]) -> List[str]:
+    """Words grouped into lines, with wide gaps written as double spaces so column splitting sees them"""
+    lines = []
+    for word in sorted(words, key=lambda word: (word['rect'][1] + word['rect'][3]) / 2):
+        x0, y0, x1, y1 = word['rect']
+        cy = (y0 + y1) / 2
+        line = lines[-1] if lines else None
+        if line and line['top'] <= cy <= line['bottom']:
+            line['words'].append(word)
+        else:
+            lines.append({'top': y0, 'bottom': y1, 'words': [word]})
+
+    texts = []
+    for line in lines:
+        words_sorted = sorted(line['words'], key=lambda word: word['rect'][0])
+        gap = COLUMN_GAP_LINE_HEIGHTS * (line['bottom'] - line['top'])
+        text = words_sorted[0]['text']
+        for left, right in zip(words_sorted, words_sorted[1:]):
+            text += ('  ' if right['rect'][0] - left['rect'][2] > gap else ' ') + right['text']
+        texts.append(text)
+    return texts
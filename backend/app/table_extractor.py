@@ -1,114 +1,339 @@
 import cv2
-import numpy as np
 import pandas as pd
-from PIL import Image
-import pytesseract
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Optional
 import logging
 
+from page_analysis import (TEXT_PROBE_ZOOM, choose_zoom, estimate_text_height, is_table_candidate,
+                           score_table_layout)
+from raster import PageRasterCache, ScratchBuffers, render_page
+from table_cells import (assign_words, cell_crop, cell_matrix, has_ink, page_words, table_grid, text_lines,
+                         words_in_region)
+from tesseract_search import TesseractConfigSearch
+from vector_tables import find_vector_tables, open_pdf
+from worker_pool import TablePool, cpu_budget, shared_table_pool
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default and highest table render zoom; adaptive zoom only goes lower, for pages with large print
+TABLE_RENDER_ZOOM = 3.0
+MIN_TABLE_RENDER_ZOOM = 1.5
+# Tesseract wants taller glyphs than EasyOCR (1.5x OCR's target), so table renders stay sharper than OCR's
+TABLE_TARGET_TEXT_HEIGHT = 21
+TABLE_TESSERACT_CONFIGS = [
+    r'--oem 3 --psm 6',
+    r'--oem 3 --psm 4', 
+    r'--oem 3 --psm 12',
+    r'--oem 1 --psm 6'
+]
+# Same rule as OCR: a page with a few real words has a usable text layer
+MIN_TEXT_LAYER_WORDS = 4
+# Images are scored for table layout at about the size of a TEXT_PROBE_ZOOM page render
+TABLE_PROBE_MAX_SIDE = 1000
+
+
+def _new_table_stats() -> Dict:
+    return {
+        'pages': 0,
+        'vector_pages': 0,
+        'raster_pages': 0,
+        'pages_skipped': 0,
+        'skipped_pages': [],
+        'regions_found': 0,
+        'regions_skipped': 0
+    }
+
+
 class TableExtractor:
-    def __init__(self):
+    def __init__(self, tesseract_search: Optional[TesseractConfigSearch] = None, adaptive_zoom: bool = True,
+                 pool: Optional[TablePool] = None):
+        self._scratch = ScratchBuffers()
+        self._stats_lock = threading.Lock()
+        self.adaptive_zoom = adaptive_zoom
+        self.tesseract_search = tesseract_search or TesseractConfigSearch()
+        # Page and region jobs share one bounded pool, within the process-wide CPU budget
+        self.pool = pool or shared_table_pool()
         print("Universal TableExtractor initialized")
         
-    def extract_tables(self, file_path: str) -> List[Dict]:
+    def extract_tables(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                       document_type: Optional[str] = None, ocr_result: Optional[Dict] = None) -> List[Dict]:
+        """ocr_result is the document's OCRProcessor result; its word boxes fill table cells without re-OCR"""
+        return self.extract_tables_with_metadata(file_path, raster_cache, document_type, ocr_result)['tables']
+    
+    def extract_tables_with_metadata(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                                     document_type: Optional[str] = None, ocr_result: Optional[Dict] = None) -> Dict:
+        """Tables plus counts of the pages and regions that went through, or were skipped by, each stage"""
+        stats = _new_table_stats()
         try:
+            words = page_words(ocr_result)
             if file_path.lower().endswith('.pdf'):
-                return self._extract_pdf_tables(file_path)
+                tables = self._extract_pdf_tables(file_path, raster_cache, document_type, words, stats)
             else:
-                return self._extract_image_tables(file_path)
+                tables = self._extract_image_tables(file_path, document_type, words.get(1), stats)
         except Exception as e:
             logger.error(f"Table extraction failed: {e}")
-            return []
+            tables = []
+        return {'tables': tables, 'metadata': stats}
     
-    def _extract_pdf_tables(self, file_path: str) -> List[Dict]:
+    def _extract_pdf_tables(self, file_path: str, raster_cache: Optional[PageRasterCache] = None,
+                            document_type: Optional[str] = None,
+                            words: Optional[Dict[int, List[Dict]]] = None, stats: Optional[Dict] = None) -> List[Dict]:
         tables = []
+        # Raster pages whose region jobs are still running, oldest first
+        pages = []
+        plumber_doc = None
+        stats = stats if stats is not None else _new_table_stats()
         try:
             doc = fitz.open(file_path)
+            stats['pages'] = len(doc)
             for page_num in range(len(doc)):
                 page = doc.load_page(page_num)
                 
-                # Convert to high-res image
-                mat = fitz.Matrix(3.0, 3.0)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img_data = pix.tobytes("png")
+                # Born-digital pages: read tables straight from the PDF's lines and characters
+                if len(page.get_text().split()) >= MIN_TEXT_LAYER_WORDS:
+                    if plumber_doc is None:
+                        plumber_doc = open_pdf(file_path)
+                    if plumber_doc is not None:
+                        stats['vector_pages'] += 1
+                        tables.extend(self._extract_vector_tables(plumber_doc.pages[page_num], page_num + 1))
+                        continue
                 
-                # Process as image
-                import io
-                pil_img = Image.open(io.BytesIO(img_data))
-                img_array = np.array(pil_img)
+                # Scanned pages: a 72 dpi probe decides whether the page is worth a full-resolution pass.
+                # It comes from the cache only when OCR already rendered the page; caching a render this
+                # small would just be replaced by the full-resolution one below.
+                cached_zoom = raster_cache.cached_zoom(page_num) if raster_cache is not None else None
+                if cached_zoom is not None and cached_zoom >= TEXT_PROBE_ZOOM:
+                    probe = raster_cache.get_page(page_num, TEXT_PROBE_ZOOM)
+                else:
+                    probe = render_page(page, TEXT_PROBE_ZOOM)
+                text_height = estimate_text_height(probe)
+                if not self._looks_like_table(probe, text_height, page_num + 1):
+                    stats['pages_skipped'] += 1
+                    stats['skipped_pages'].append(page_num + 1)
+                    continue
+                
+                stats['raster_pages'] += 1
+                zoom = self._table_zoom(text_height, page_num + 1)
+                
+                # Convert to high-res image, reusing the pipeline's render when one is shared;
+                # rendering stays on this thread since PyMuPDF documents are not thread-safe
+                if raster_cache is not None:
+                    img_array = raster_cache.get_page(page_num, zoom)
+                else:
+                    img_array = render_page(page, zoom)
                 
-                page_tables = self._process_image_for_tables(img_array, page_num + 1)
-                tables.extend(page_tables)
+                pages.append(self._start_page(
+                    img_array, page_num + 1, document_type, (words or {}).get(page_num + 1), zoom,
+                    text_height * zoom / TEXT_PROBE_ZOOM if text_height else None, stats
+                ))
+                # Bound page renders held while the pool catches up
+                while len(pages) > self.pool.max_workers * 2:
+                    tables.extend(self._finish_page(pages.pop(0), stats))
+            
+            while pages:
+                tables.extend(self._finish_page(pages.pop(0), stats))
                     
             doc.close()
         except Exception as e:
             logger.error(f"PDF processing failed: {e}")
-            
+        finally:
+            if plumber_doc is not None:
+                plumber_doc.close()
+        
+        tables.sort(key=lambda table: (table['page'], table['table_id']))
         return tables
     
-    def _extract_image_tables(self, file_path: str) -> List[Dict]:
+    def _extract_vector_tables(self, plumber_page, page_num: int) -> List[Dict]:
+        tables = []
+        try:
+            for i, found in enumerate(find_vector_tables(plumber_page)):
+                table_data = self._table_record(
+                    found['rows'], i + 1, page_num, f"vector_{found['strategy']}",
+                    95 if found['strategy'] == 'lines' else 85
+                )
+                if table_data:
+                    x0, top, x1, bottom = found['bbox']
+                    table_data['bounding_box'] = {'x': x0, 'y': top, 'width': x1 - x0, 'height': bottom - top}
+                    # PDF points, i.e. pixels at zoom 1.0
+                    table_data['render_zoom'] = 1.0
+                    tables.append(table_data)
+        except Exception as e:
+            logger.error(f"Vector table extraction failed on page {page_num}: {e}")
+        finally:
+            plumber_page.flush_cache()
+        return tables
+    
+    def _looks_like_table(self, gray, text_height, page_num) -> bool:
+        """Cheap check for ruling lines or column-aligned text; errors count as a yes"""
+        try:
+            return is_table_candidate(score_table_layout(gray, text_height))
+        except Exception as e:
+            logger.error(f"Table layout check failed on page {page_num}: {e}")
+            return True
+    
+    def _table_zoom(self, text_height: Optional[float], page_num: int) -> float:
+        """Render zoom that makes text measured on a TEXT_PROBE_ZOOM probe about TABLE_TARGET_TEXT_HEIGHT pixels tall"""
+        if not self.adaptive_zoom:
+            return TABLE_RENDER_ZOOM
+        try:
+            return choose_zoom(
+                text_height, TEXT_PROBE_ZOOM, TABLE_TARGET_TEXT_HEIGHT,
+                MIN_TABLE_RENDER_ZOOM, TABLE_RENDER_ZOOM, TABLE_RENDER_ZOOM
+            )
+        except Exception as e:
+            logger.error(f"Table zoom estimate failed on page {page_num}: {e}")
+            return TABLE_RENDER_ZOOM
+    
+    def _extract_image_tables(self, file_path: str, document_type: Optional[str] = None,
+                              words: Optional[List[Dict]] = None, stats: Optional[Dict] = None) -> List[Dict]:
         """Extract tables from image"""
+        stats = stats if stats is not None else _new_table_stats()
         try:
-            image = cv2.imread(file_path)
+            image = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
             if image is None:
                 return []
-            return self._process_image_for_tables(image, 1)
+            stats['pages'] = 1
+            
+            height, width = image.shape
+            scale = min(1.0, TABLE_PROBE_MAX_SIDE / max(height, width))
+            probe = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA) if scale < 1 else image
+            text_height = estimate_text_height(probe)
+            if not self._looks_like_table(probe, text_height, 1):
+                stats['pages_skipped'] += 1
+                stats['skipped_pages'].append(1)
+                return []
+            
+            stats['raster_pages'] += 1
+            return self._process_image_for_tables(
+                image, 1, document_type, words, 1.0, text_height / scale if text_height else None, stats
+            )
         except Exception as e:
             logger.error(f"Image processing failed: {e}")
             return []
     
-    def _process_image_for_tables(self, image, page_num):
-        """Process image to find and extract ALL tables"""
-        tables = []
+    def _process_image_for_tables(self, image, page_num, document_type=None, words=None, zoom=1.0,
+                                  text_height=None, stats=None):
+        """Process image to find and extract ALL tables; words are the page's OCR boxes at zoom 1.0, if any"""
+        return self._finish_page(
+            self._start_page(image, page_num, document_type, words, zoom, text_height, stats), stats
+        )
+    
+    def _start_page(self, image, page_num, document_type=None, words=None, zoom=1.0, text_height=None, stats=None):
+        """Queue the region search for a page; its region jobs are queued as soon as the search finishes.
+        
+        Jobs are queued from the search's completion callback rather than from
+        inside the search, so no pool thread ever waits on the pool itself.
+        """
+        state = {
+            'page_num': page_num,
+            'zoom': zoom,
+            'args': (page_num, document_type, words, zoom, text_height, stats),
+            'regions': Future()
+        }
         
-        # Convert to grayscale
+        def queue_regions(search):
+            try:
+                gray, regions, targets, masks = search.result()
+                jobs = [
+                    (region, self.pool.submit(self._extract_region, gray, region, region_masks, i + 1, *state['args']))
+                    for i, (region, region_masks) in enumerate(zip(targets, masks))
+                ]
+                state['regions'].set_result((gray, bool(regions), jobs))
+            except Exception as e:
+                state['regions'].set_exception(e)
+        
+        self.pool.submit(self._search_regions, image).add_done_callback(queue_regions)
+        return state
+    
+    def _finish_page(self, state, stats=None) -> List[Dict]:
+        """Wait for a page's region jobs; tables come back in table_id order"""
+        try:
+            gray, found, jobs = state['regions'].result()
+        except Exception as e:
+            logger.error(f"Table region search failed on page {state['page_num']}: {e}")
+            return []
+        
+        if stats is not None and found:
+            stats['regions_found'] += len(jobs)
+        tables = self._collect_regions(jobs, state['page_num'])
+        
+        # Regions were found but none held a table: fall back to the entire image, whose masks are rebuilt
+        if found and not tables:
+            h, w = gray.shape
+            jobs = [((0, 0, w, h), self.pool.submit(self._extract_region, gray, (0, 0, w, h), None, 1, *state['args']))]
+            tables = self._collect_regions(jobs, state['page_num'])
+        
+        for table in tables:
+            # Bounding boxes are in pixels of this render
+            table['render_zoom'] = state['zoom']
+        return tables
+    
+    def _collect_regions(self, jobs, page_num) -> List[Dict]:
+        tables = []
+        for (x, y, w, h), future in jobs:
+            try:
+                table_data = future.result()
+            except Exception as e:
+                logger.error(f"Table region extraction failed on page {page_num}: {e}")
+                continue
+            if table_data:
+                table_data['bounding_box'] = {'x': x, 'y': y, 'width': w, 'height': h}
+                tables.append(table_data)
+        return tables
+    
+    def _search_regions(self, image):
+        """Gray page, its table regions, the regions to extract and each one's (binary, h_lines, v_lines) masks"""
+        # Convert to grayscale (PDF pages already arrive as gray renders)
         if len(image.shape) == 3:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         else:
             gray = image
         
         # Method 1: Find table regions using contours
-        table_regions = self._find_table_regions(gray)
-        
-        for i, (x, y, w, h) in enumerate(table_regions):
-            table_crop = gray[y:y+h, x:x+w]
-            table_data = self._extract_table_data(table_crop, i + 1, page_num)
-            if table_data:
-                table_data['bounding_box'] = {'x': x, 'y': y, 'width': w, 'height': h}
-                tables.append(table_data)
+        binary, h_lines, v_lines = self._line_masks(gray)
+        regions = self._find_table_regions(gray, h_lines, v_lines)
         
         # Method 2: If no regions found, process entire image
-        if not tables:
-            table_data = self._extract_table_data(gray, 1, page_num)
-            if table_data:
-                h, w = gray.shape
-                table_data['bounding_box'] = {'x': 0, 'y': 0, 'width': w, 'height': h}
-                tables.append(table_data)
+        targets = regions or [(0, 0, gray.shape[1], gray.shape[0])]
+        # The page masks live in this thread's scratch buffers, so region jobs get owned copies of their crops
+        masks = [
+            tuple(mask[y:y+h, x:x+w].copy() for mask in (binary, h_lines, v_lines))
+            for x, y, w, h in targets
+        ]
+        return gray, regions, targets, masks
+    
+    def _line_masks(self, gray, prefix=''):
+        """Inverted binary image and its horizontal / vertical line masks, in this thread's scratch buffers"""
+        binary = self._scratch.get(f'{prefix}binary', gray.shape)
+        h_lines = self._scratch.get(f'{prefix}h_lines', gray.shape)
+        v_lines = self._scratch.get(f'{prefix}v_lines', gray.shape)
         
-        return tables
+        # Enhance image
+        cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2, dst=binary)
+        
+        # Detect lines
+        h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+        v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+        
+        cv2.morphologyEx(binary, cv2.MORPH_OPEN, h_kernel, dst=h_lines)
+        cv2.morphologyEx(binary, cv2.MORPH_OPEN, v_kernel, dst=v_lines)
+        return binary, h_lines, v_lines
     
-    def _find_table_regions(self, gray):
+    def _find_table_regions(self, gray, h_lines, v_lines):
         """Find potential table regions"""
         regions = []
         
         try:
-            # Enhance image
-            binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
-            
-            # Detect lines
-            h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-            v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-            
-            h_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, h_kernel)
-            v_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, v_kernel)
+            # Page-sized intermediates are reused across pages instead of reallocated
+            table_mask = self._scratch.get('table_mask', gray.shape)
             
             # Combine
-            table_mask = cv2.bitwise_or(h_lines, v_lines)
+            cv2.bitwise_or(h_lines, v_lines, dst=table_mask)
             
             # Find contours
             contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -123,25 +348,89 @@ class TableExtractor:
             
         return regions
     
-    def _extract_table_data(self, image_crop, table_id, page_num):
+    def _extract_region(self, gray, region, masks, table_id, page_num, document_type=None, words=None, zoom=1.0,
+                        text_height=None, stats=None):
+        """Table from one region: its ruled grid when it has one, else the page's OCR words, else crop OCR.
+        
+        masks are the region's crops of the page line masks; None builds them for the crop.
+        """
+        x, y, w, h = region
+        region_words = words_in_region(words, zoom, region) if words is not None else None
+        
+        crop = gray[y:y+h, x:x+w]
+        
+        if masks is None:
+            masks = self._line_masks(crop, 'region_')
+        binary, h_lines, v_lines = masks
+        grid = table_grid(h_lines, v_lines)
+        if grid is not None and grid['rows'] >= 2 and grid['columns'] >= 2:
+            return self._table_from_grid(crop, binary, (x, y), grid, region_words, table_id, page_num)
+        
+        # Boxes, rules and prose without aligned columns are not tables; skip them before any OCR
+        if not self._looks_like_table(crop, text_height, page_num):
+            if stats is not None:
+                with self._stats_lock:
+                    stats['regions_skipped'] += 1
+            return None
+        
+        # No ruled grid: split the words into columns at wide gaps
+        if region_words:
+            rows = self._parse_any_table_format('\n'.join(text_lines(region_words)))
+            return self._table_record(rows, table_id, page_num, 'ocr_word_boxes', 80)
+        
+        return self._extract_table_data(crop, table_id, page_num, document_type)
+    
+    def _table_from_grid(self, crop, binary, offset, grid, region_words, table_id, page_num):
+        """Fill a cell grid from OCR words, recognizing cells that have ink but no words on the Tesseract pool"""
+        x, y = offset
+        cells = grid['cells']
+        texts = assign_words(cells, region_words) if region_words else [''] * len(cells)
+        
+        # Each cell is an independent job holding its own budget slot, so this job's slot is lent to them
+        futures = {}
+        with cpu_budget.lent():
+            for i, cell in enumerate(cells):
+                if not texts[i] and has_ink(binary, cell['bbox']):
+                    try:
+                        futures[i] = self.tesseract_search.pool.submit_line(cell_crop(crop, cell['bbox']))
+                    except Exception as e:
+                        logger.error(f"Cell OCR failed: {e}")
+                        break
+            for i, future in futures.items():
+                try:
+                    texts[i] = ' '.join(future.result()[0].split())
+                except Exception as e:
+                    logger.error(f"Cell OCR failed on page {page_num}, table {table_id}: {e}")
+        
+        if not any(texts):
+            return None
+        
+        method = 'ocr_word_boxes' if region_words else 'grid_cell_ocr'
+        table_data = self._table_record(cell_matrix(grid, texts), table_id, page_num, method, 85)
+        if table_data:
+            table_data['cells'] = [
+                {
+                    'row': cell['row'], 'col': cell['col'],
+                    'row_span': cell['row_span'], 'col_span': cell['col_span'],
+                    'text': text,
+                    'bbox': {
+                        'x': x + cell['bbox'][0], 'y': y + cell['bbox'][1],
+                        'width': cell['bbox'][2], 'height': cell['bbox'][3]
+                    }
+                }
+                for cell, text in zip(cells, texts)
+            ]
+            table_data['cells_ocr_fallback'] = len(futures)
+        return table_data
+    
+    def _extract_table_data(self, image_crop, table_id, page_num, document_type=None):
         """Extract table data using OCR - UNIVERSAL METHOD"""
         try:
-            # Multiple OCR attempts with different configs
-            configs = [
-                r'--oem 3 --psm 6',
-                r'--oem 3 --psm 4', 
-                r'--oem 3 --psm 12',
-                r'--oem 1 --psm 6'
-            ]
-            
-            text = None
-            for config in configs:
-                try:
-                    text = pytesseract.image_to_string(image_crop, config=config)
-                    if text and len(text.strip()) > 10:
-                        break
-                except:
-                    continue
+            # Multiple OCR attempts with different configs, run in parallel; more than 10 characters is good enough
+            text, _ = self.tesseract_search.search(
+                image_crop, TABLE_TESSERACT_CONFIGS, 'table', document_type,
+                threshold=11, score=lambda candidate: len(candidate.strip())
+            )
             
             if not text or len(text.strip()) < 5:
                 return None
@@ -149,51 +438,58 @@ class TableExtractor:
             # Parse text into table
             rows = self._parse_any_table_format(text)
             
-            if len(rows) < 2:
-                return None
-            
-            # Create DataFrame
-            headers = rows[0]
-            data_rows = rows[1:]
-            
-            # Normalize columns
-            max_cols = len(headers)
-            normalized_rows = []
-            
-            for row in data_rows:
-                if len(row) > max_cols:
-                    row = row[:max_cols]
-                elif len(row) < max_cols:
-                    row.extend([''] * (max_cols - len(row)))
-                normalized_rows.append(row)
-            
-            if not normalized_rows:
-                return None
-            
-            df = pd.DataFrame(normalized_rows, columns=headers)
-            
-            # Clean DataFrame
-            df = df.dropna(how='all').reset_index(drop=True)
-            if df.empty:
-                return None
-            
-            return {
-                'table_id': table_id,
-                'page': page_num,
-                'accuracy': 80,
-                'data': df.to_dict('records'),
-                'csv': df.to_csv(index=False),
-                'json': df.to_json(orient='records'),
-                'extraction_method': 'universal_ocr',
-                'rows': len(df),
-                'columns': len(df.columns),
-                'headers': list(df.columns)
-            }
+            return self._table_record(rows, table_id, page_num, 'universal_ocr', 80)
             
         except Exception as e:
             logger.error(f"Table data extraction failed: {e}")
             return None
     
+    def _table_record(self, rows, table_id, page_num, method, accuracy):
+        """Table dict from parsed rows; the first row is the header"""
+        if len(rows) < 2:
+            return None
+        
+        # Create DataFrame; blank or repeated headers would collapse columns in the records
+        headers = []
+        for i, header in enumerate(rows[0]):
+            header = header or f"column_{i + 1}"
+            headers.append(header if header not in headers else f"{header}_{i + 1}")
+        data_rows = rows[1:]
+        
+        # Normalize columns
+        max_cols = len(headers)
+        normalized_rows = []
+        
+        for row in data_rows:
+            if len(row) > max_cols:
+                row = row[:max_cols]
+            elif len(row) < max_cols:
+                row = row + [''] * (max_cols - len(row))
+            normalized_rows.append(row)
+        
+        if not normalized_rows:
+            return None
+        
+        df = pd.DataFrame(normalized_rows, columns=headers)
+        
+        # Clean DataFrame
+        df = df.dropna(how='all').reset_index(drop=True)
+        if df.empty:
+            return None
+        
+        return {
+            'table_id': table_id,
+            'page': page_num,
+            'accuracy': accuracy,
+            'data': df.to_dict('records'),
+            'csv': df.to_csv(index=False),
+            'json': df.to_json(orient='records'),
+            'extraction_method': method,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'headers': list(df.columns)
+        }
+    
     def _parse_any_table_format(self, text):
         """Parse ANY table format from text"""
         lines = [line.strip() for line in text.split('\n') if line.strip()]
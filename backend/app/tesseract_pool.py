@@ -0,0 +1,149 @@
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+from worker_pool import CPU_BUDGET, submit_budgeted
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TESSERACT_LANGUAGE = 'eng'
+DEFAULT_TESSERACT_WORKERS = max(1, min(4, CPU_BUDGET))
+# Engine modes the repo's configs use; each needs its own initialized API
+PRELOAD_OEMS = (3, 1)
+# Single text line, for re-reading one region at a time
+LINE_CONFIG = r'--oem 3 --psm 7'
+
+# Per-process tesserocr handles keyed by OCR engine mode, created on first use
+_apis: Dict[int, object] = {}
+_apis_lock = threading.Lock()
+
+
+def _parse_config(config: str) -> Tuple[int, int]:
+    oem = re.search(r'--oem\s+(\d+)', config)
+    psm = re.search(r'--psm\s+(\d+)', config)
+    return int(oem.group(1)) if oem else 3, int(psm.group(1)) if psm else 3
+
+
+def _get_api(oem: int):
+    import tesserocr
+
+    api = _apis.get(oem)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=TESSERACT_LANGUAGE, oem=oem)
+        _apis[oem] = api
+    return api
+
+
+def tesserocr_available() -> bool:
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _init_tesseract_worker():
+    try:
+        for oem in PRELOAD_OEMS:
+            _get_api(oem)
+    except ImportError:
+        logger.info("tesserocr not installed; Tesseract workers will shell out via pytesseract")
+    except Exception as e:
+        logger.error(f"Tesseract worker {os.getpid()} failed to preload language data: {e}")
+
+
+def run_tesseract(image: np.ndarray, config: str) -> str:
+    """image_to_string equivalent that reuses this process's loaded Tesseract engine.
+
+    Falls back to pytesseract (a subprocess and temp file per call) when
+    tesserocr is not installed.
+    """
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        import pytesseract
+        return pytesseract.image_to_string(image, config=config) or ''
+
+    oem, psm = _parse_config(config)
+    with _apis_lock:
+        api = _get_api(oem)
+        api.SetPageSegMode(psm)
+        api.SetImage(Image.fromarray(image))
+        text = api.GetUTF8Text()
+        api.Clear()
+    return text or ''
+
+
+def run_tesseract_line(image: np.ndarray) -> Tuple[str, float]:
+    """Read a single text line, returning (text, mean word confidence in 0-1)"""
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        import pytesseract
+        data = pytesseract.image_to_data(image, config=LINE_CONFIG, output_type=pytesseract.Output.DICT)
+        words = [(word, float(conf)) for word, conf in zip(data['text'], data['conf']) if word.strip() and float(conf) >= 0]
+        if not words:
+            return '', 0.0
+        return ' '.join(word for word, _ in words), sum(conf for _, conf in words) / len(words) / 100
+
+    oem, psm = _parse_config(LINE_CONFIG)
+    with _apis_lock:
+        api = _get_api(oem)
+        api.SetPageSegMode(psm)
+        api.SetImage(Image.fromarray(image))
+        text = (api.GetUTF8Text() or '').strip()
+        confidence = api.MeanTextConf() / 100 if text else 0.0
+        api.Clear()
+    return text, confidence
+
+
+class TesseractPool:
+    """Long-lived Tesseract worker processes fed in-memory images.
+
+    Each worker keeps its engines and language data loaded between calls,
+    so a request only pays for recognition, not process start-up. Every
+    call holds a CPU budget slot while it is queued or running; callers that
+    hold slots themselves wait inside cpu_budget.lent().
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_TESSERACT_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                if not tesserocr_available():
+                    logger.warning("tesserocr is not installed; Tesseract pool workers will start a tesseract "
+                                   "subprocess for every call instead of keeping engines loaded")
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_tesseract_worker
+                )
+            return self._pool
+
+    def submit(self, image: np.ndarray, config: str) -> Future:
+        return submit_budgeted(self._get_pool(), run_tesseract, image, config)
+
+    def submit_line(self, image: np.ndarray) -> Future:
+        """run_tesseract_line in a worker; resolves to (text, confidence)"""
+        return submit_budgeted(self._get_pool(), run_tesseract_line, image)
+
+    def image_to_string(self, image: np.ndarray, config: str) -> str:
+        return self.submit(image, config).result()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
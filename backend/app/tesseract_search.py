@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from tesseract_pool import TesseractPool
+from worker_pool import cpu_budget
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFERENCES_PATH = 'tesseract_preferences.json'
+# Preference slot for documents whose type is not known yet (new uploads are OCR'd before classification)
+ANY_DOCUMENT_TYPE = '*'
+
+
+def word_score(text: str) -> int:
+    return len(text.split())
+
+
+class TesseractConfigSearch:
+    """Runs candidate Tesseract configs in parallel and stops once one is good enough.
+
+    The config that wins for a (purpose, document type) pair is remembered and
+    tried on its own first next time, so well-known document types usually
+    need a single Tesseract run. The latest winner for a purpose is also kept
+    for documents whose type is not known yet.
+    """
+
+    def __init__(self, pool: Optional[TesseractPool] = None,
+                 preferences_path: Optional[str] = DEFAULT_PREFERENCES_PATH):
+        self.pool = pool or TesseractPool()
+        self.preferences_path = preferences_path
+        self.preferences = {}
+        self._lock = threading.Lock()
+        self.load_preferences()
+
+    def load_preferences(self):
+        if not self.preferences_path:
+            return
+        try:
+            with open(self.preferences_path, 'r') as f:
+                self.preferences = json.load(f)
+        except FileNotFoundError:
+            self.preferences = {}
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable Tesseract preferences: {e}")
+            self.preferences = {}
+
+    def save_preferences(self):
+        if not self.preferences_path:
+            return
+        try:
+            with open(self.preferences_path, 'w') as f:
+                json.dump(self.preferences, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save Tesseract preferences: {e}")
+
+    def close(self):
+        self.pool.close()
+
+    @staticmethod
+    def _preference_key(purpose: str, document_type: Optional[str]) -> str:
+        return f"{purpose}:{(document_type or ANY_DOCUMENT_TYPE).lower()}"
+
+    def preferred_config(self, purpose: str, document_type: Optional[str]) -> Optional[str]:
+        preferred = self.preferences.get(self._preference_key(purpose, document_type))
+        return preferred or self.preferences.get(self._preference_key(purpose, None))
+
+    def record_winner(self, purpose: str, document_type: Optional[str], config: Optional[str]):
+        """Remember config as the one to try first; only pass configs that reached the search threshold"""
+        if not config:
+            return
+        keys = {self._preference_key(purpose, document_type), self._preference_key(purpose, None)}
+        with self._lock:
+            changed = [key for key in keys if self.preferences.get(key) != config]
+            if not changed:
+                return
+            for key in changed:
+                self.preferences[key] = config
+        self.save_preferences()
+
+    def search(self, image: np.ndarray, configs: List[str], purpose: str,
+               document_type: Optional[str] = None, threshold: float = 20,
+               score: Callable[[str], float] = word_score) -> Tuple[str, Optional[str]]:
+        """Return (text, config) for the best run, stopping early once a score reaches threshold.
+
+        The config is only remembered when its run reached threshold; callers
+        re-recording it under a type found later should check the same.
+        """
+        # The runs hold their own budget slots, so a budgeted caller's slots are lent to them meanwhile
+        with cpu_budget.lent():
+            return self._search(image, configs, purpose, document_type, threshold, score)
+
+    def _search(self, image: np.ndarray, configs: List[str], purpose: str, document_type: Optional[str],
+                threshold: float, score: Callable[[str], float]) -> Tuple[str, Optional[str]]:
+        best_text, best_config, best_score = '', None, 0
+
+        preferred = self.preferred_config(purpose, document_type)
+        if preferred:
+            try:
+                text = self.pool.image_to_string(image, preferred).strip()
+                if score(text) >= threshold:
+                    return text, preferred
+                best_text, best_config, best_score = text, preferred, score(text)
+            except Exception as e:
+                logger.error(f"Preferred Tesseract config {preferred} failed: {e}")
+
+        remaining = [config for config in configs if config != preferred]
+        if not remaining:
+            return best_text, best_config
+
+        futures = {self.pool.submit(image, config): config for config in remaining}
+        not_done = set(futures)
+
+        try:
+            while not_done:
+                done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        text = future.result().strip()
+                    except Exception:
+                        continue
+                    text_score = score(text)
+                    if text_score > best_score:
+                        best_text, best_config, best_score = text, futures[future], text_score
+
+                if best_score >= threshold:
+                    break
+        finally:
+            # Runs that have not started yet are dropped; ones already running finish in the background
+            for future in not_done:
+                future.cancel()
+
+        if best_score >= threshold:
+            self.record_winner(purpose, document_type, best_config)
+
+        return best_text, best_config
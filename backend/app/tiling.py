@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Boxes ending this close to a shared tile edge were probably cut off; the neighbouring tile has them whole
+EDGE_MARGIN = 4
+
+
+def _starts(length: int, tile_size: int, step: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Overlapping (x, y, w, h) tiles covering the image, last row/column flush with the edge"""
+    step = max(1, tile_size - overlap)
+    return [
+        (x, y, min(tile_size, width - x), min(tile_size, height - y))
+        for y in _starts(height, tile_size, step)
+        for x in _starts(width, tile_size, step)
+    ]
+
+
+def offset_bbox(bbox: List, dx: int, dy: int) -> List[List[int]]:
+    return [[int(x) + dx, int(y) + dy] for x, y in bbox]
+
+
+def _rect(bbox: List) -> Tuple[float, float, float, float]:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def cut_by_tile_edge(bbox: List, tile: Tuple[int, int, int, int], width: int, height: int, overlap: int) -> bool:
+    """True if a tile-local box runs into a shared tile edge and the neighbouring tile sees it whole.
+
+    Only boxes that fit inside the overlap band are guaranteed to appear
+    uncut in the neighbour; longer ones are kept and left to dedupe_boxes.
+    """
+    x, y, w, h = tile
+    left, top, right, bottom = _rect(bbox)
+    fits_across = right - left <= overlap - 2 * EDGE_MARGIN
+    fits_down = bottom - top <= overlap - 2 * EDGE_MARGIN
+    return (
+        (fits_across and x > 0 and left <= EDGE_MARGIN) or
+        (fits_down and y > 0 and top <= EDGE_MARGIN) or
+        (fits_across and x + w < width and right >= w - EDGE_MARGIN) or
+        (fits_down and y + h < height and bottom >= h - EDGE_MARGIN)
+    )
+
+
+def dedupe_boxes(boxes: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
+    """Greedy non-maximum suppression over full-image boxes, keeping the most confident"""
+    if len(boxes) < 2:
+        return boxes
+
+    rects = np.array([_rect(box['bbox']) for box in boxes], dtype=np.float64)
+    areas = (rects[:, 2] - rects[:, 0]) * (rects[:, 3] - rects[:, 1])
+    order = np.argsort([-box['confidence'] for box in boxes], kind='stable')
+
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        inter_w = np.clip(np.minimum(rects[best, 2], rects[rest, 2]) - np.maximum(rects[best, 0], rects[rest, 0]), 0, None)
+        inter_h = np.clip(np.minimum(rects[best, 3], rects[rest, 3]) - np.maximum(rects[best, 1], rects[rest, 1]), 0, None)
+        intersection = inter_w * inter_h
+        union = areas[best] + areas[rest] - intersection
+        iou = np.where(union > 0, intersection / np.maximum(union, 1e-9), 0)
+
+        order = rest[iou < iou_threshold]
+
+    return [boxes[index] for index in sorted(keep)]
+
+
+def reading_order(boxes: List[Dict]) -> List[Dict]:
+    """Sort boxes into lines (by top edge, bucketed by typical box height), then left to right"""
+    if not boxes:
+        return boxes
+
+    rects = [_rect(box['bbox']) for box in boxes]
+    line_height = max(1.0, float(np.median([bottom - top for _, top, _, bottom in rects])))
+    order = sorted(range(len(boxes)), key=lambda i: (int(rects[i][1] // line_height), rects[i][0]))
+    return [boxes[i] for i in order]
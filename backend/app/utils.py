@@ -74,30 +74,43 @@ class KeyValueExtractor:
         if not bounding_boxes:
             return []
         
-        sorted_boxes = sorted(bounding_boxes, key=lambda x: x['bounding_box']['y'])
+        sorted_boxes = sorted(bounding_boxes, key=lambda x: (x.get('page', 1), self._box_origin(x)[1]))
         
         lines = []
         current_line = [sorted_boxes[0]]
-        line_y = sorted_boxes[0]['bounding_box']['y']
+        line_page = sorted_boxes[0].get('page', 1)
+        line_y = self._box_origin(sorted_boxes[0])[1]
         tolerance = 10 
         
         for box in sorted_boxes[1:]:
-            box_y = box['bounding_box']['y']
+            box_y = self._box_origin(box)[1]
             
-            if abs(box_y - line_y) <= tolerance:
+            if box.get('page', 1) == line_page and abs(box_y - line_y) <= tolerance:
                 current_line.append(box)
             else:
-                current_line.sort(key=lambda x: x['bounding_box']['x'])
+                current_line.sort(key=lambda x: self._box_origin(x)[0])
                 lines.append(current_line)
                 current_line = [box]
+                line_page = box.get('page', 1)
                 line_y = box_y
         
         if current_line:
-            current_line.sort(key=lambda x: x['bounding_box']['x'])
+            current_line.sort(key=lambda x: self._box_origin(x)[0])
             lines.append(current_line)
         
         return lines
     
+    def _box_origin(self, box: Dict) -> Tuple[float, float]:
+        """Top-left corner, from either an x/y box or an OCR corner polygon"""
+        if 'bounding_box' in box:
+            return box['bounding_box']['x'], box['bounding_box']['y']
+        
+        # Polygon boxes are in render pixels; scale back to page units so the tolerance is consistent
+        zoom = box.get('zoom', 1.0) or 1.0
+        xs = [point[0] for point in box['bbox']]
+        ys = [point[1] for point in box['bbox']]
+        return min(xs) / zoom, min(ys) / zoom
+    
     def _extract_colon_pairs(self, text: str) -> Dict:
         pairs = {}
         
@@ -0,0 +1,131 @@
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+logger = logging.getLogger(__name__)
+
+# Ruled tables: cell edges come from the PDF's drawn lines and rectangles
+LINE_TABLE_SETTINGS = {
+    'vertical_strategy': 'lines',
+    'horizontal_strategy': 'lines',
+    'snap_tolerance': 3,
+    'intersection_tolerance': 3
+}
+# Unruled tables: columns come from runs of aligned words
+TEXT_TABLE_SETTINGS = {
+    'vertical_strategy': 'text',
+    'horizontal_strategy': 'text',
+    'min_words_vertical': 3,
+    'min_words_horizontal': 2
+}
+# Text-aligned grids also match ordinary paragraphs; keep only the ones that are mostly filled in
+MIN_TEXT_TABLE_FILL = 0.6
+# ... and whose column edges mostly sit in gutters wider than a word space (points)
+MIN_GUTTER_WIDTH = 8.0
+MIN_GUTTER_FRACTION = 0.5
+MIN_TABLE_ROWS = 2
+MIN_TABLE_COLUMNS = 2
+
+
+def open_pdf(file_path: str):
+    """pdfplumber document for file_path, or None when pdfplumber is not installed"""
+    if pdfplumber is None:
+        return None
+    return pdfplumber.open(file_path)
+
+
+def _clean_rows(rows: List[List[Optional[str]]]) -> List[List[str]]:
+    cleaned = []
+    for row in rows:
+        cells = [' '.join((cell or '').split()) for cell in row]
+        if any(cells):
+            cleaned.append(cells)
+
+    if not cleaned:
+        return []
+
+    # Drop columns that are empty all the way down (gaps between ruling lines)
+    keep = [i for i in range(len(cleaned[0])) if any(row[i] for row in cleaned)]
+    return [[row[i] for i in keep] for row in cleaned]
+
+
+def _fill_ratio(rows: List[List[str]]) -> float:
+    cells = [cell for row in rows for cell in row]
+    return sum(1 for cell in cells if cell) / len(cells) if cells else 0.0
+
+
+def _crossed_edges(page, bbox, edges: List[float]) -> Dict[float, set]:
+    """Per text line (by top), the column edges that a word or a word-space-sized gap runs across"""
+    lines = {}
+    for word in page.within_bbox(bbox).extract_words():
+        lines.setdefault(round(word['top'], 1), []).append(word)
+
+    crossed = {}
+    for top, words in lines.items():
+        words.sort(key=lambda word: word['x0'])
+        spans = [(word['x0'], word['x1']) for word in words]
+        spans += [
+            (left['x1'], right['x0']) for left, right in zip(words, words[1:])
+            if right['x0'] - left['x1'] < MIN_GUTTER_WIDTH
+        ]
+        crossed[top] = {edge for edge in edges for x0, x1 in spans if x0 < edge - 1 and x1 > edge + 1}
+    return crossed
+
+
+def _text_table(page, table) -> Optional[Dict]:
+    """A word-aligned table with flowing text above and below it (titles, notes) trimmed off,
+    or None when its columns are not separated by real gutters."""
+    edges = sorted({round(cell[0], 1) for cell in table.cells})[1:]
+    if not edges:
+        return None
+    crossed = _crossed_edges(page, table.bbox, edges)
+
+    def flows(row) -> bool:
+        _, top, _, bottom = row.bbox
+        return any(crossed[line] for line in crossed if top - 1 <= line <= bottom)
+
+    extracted = table.extract()
+    first, last = 0, len(table.rows)
+    while first < last and flows(table.rows[first]):
+        first += 1
+    while last > first and flows(table.rows[last - 1]):
+        last -= 1
+    if last - first < MIN_TABLE_ROWS:
+        return None
+
+    kept = table.rows[first:last]
+    bbox = (
+        min(row.bbox[0] for row in kept), kept[0].bbox[1],
+        max(row.bbox[2] for row in kept), kept[-1].bbox[3]
+    )
+    narrow = set().union(*(edges for line, edges in crossed.items() if bbox[1] - 1 <= line <= bbox[3]))
+    if 1 - len(narrow) / len(edges) < MIN_GUTTER_FRACTION:
+        return None
+    return {'rows': _clean_rows(extracted[first:last]), 'bbox': bbox}
+
+
+def find_vector_tables(page) -> List[Dict]:
+    """Tables on a pdfplumber page from its ruling lines, falling back to word alignment.
+
+    Returns [{'rows', 'bbox': (x0, top, x1, bottom) in PDF points, 'strategy'}].
+    """
+    found = []
+    for strategy, settings in (('lines', LINE_TABLE_SETTINGS), ('text', TEXT_TABLE_SETTINGS)):
+        for table in page.find_tables(table_settings=settings):
+            if strategy == 'text':
+                candidate = _text_table(page, table)
+                if candidate is None or _fill_ratio(candidate['rows']) < MIN_TEXT_TABLE_FILL:
+                    continue
+            else:
+                candidate = {'rows': _clean_rows(table.extract()), 'bbox': table.bbox}
+            rows = candidate['rows']
+            if len(rows) < MIN_TABLE_ROWS or len(rows[0]) < MIN_TABLE_COLUMNS:
+                continue
+            found.append({'rows': rows, 'bbox': tuple(float(v) for v in candidate['bbox']), 'strategy': strategy})
+        if found:
+            break
+    return found
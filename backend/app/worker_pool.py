@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# CPUs the backend keeps busy at once across OCR batches in flight, running table jobs and Tesseract pool jobs
+CPU_BUDGET = max(1, int(os.environ.get('CPU_BUDGET', '0') or 0) or os.cpu_count() or 1)
+DEFAULT_TABLE_WORKERS = max(1, min(4, CPU_BUDGET))
+
+
+class CpuBudget:
+    """Counting slots shared by every CPU-heavy job in the process.
+
+    A job takes as many slots as the threads it runs. Jobs never wait on
+    other budgeted jobs while holding slots (a thread that has to lends its
+    slot back with lent()), so the budget only ever delays work, it cannot
+    deadlock it.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._in_use = 0
+        self._condition = threading.Condition()
+        # Slots taken with the context manager, per thread, so lent() knows what the thread holds
+        self._local = threading.local()
+
+    def _weight(self, weight: int) -> int:
+        # A job wider than the whole budget runs alone rather than never
+        return max(1, min(weight, self.slots))
+
+    def acquire(self, weight: int = 1, timeout: Optional[float] = None) -> bool:
+        """Take weight slots, waiting at most timeout seconds (None waits as long as it takes)"""
+        weight = self._weight(weight)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_use + weight <= self.slots, timeout):
+                return False
+            self._in_use += weight
+            return True
+
+    def release(self, weight: int = 1):
+        with self._condition:
+            self._in_use -= self._weight(weight)
+            self._condition.notify_all()
+
+    def has_room(self, weight: int = 1) -> bool:
+        with self._condition:
+            return self._in_use + self._weight(weight) <= self.slots
+
+    def __enter__(self):
+        self.acquire()
+        self._local.held = getattr(self._local, 'held', 0) + 1
+        return self
+
+    def __exit__(self, *exc):
+        self._local.held -= 1
+        self.release()
+
+    @contextmanager
+    def lent(self):
+        """Hand back this thread's slots while it only waits on other budgeted jobs, and take them again after"""
+        held = getattr(self._local, 'held', 0)
+        for _ in range(held):
+            self.release()
+        self._local.held = 0
+        try:
+            yield
+        finally:
+            for _ in range(held):
+                self.acquire()
+            self._local.held = held
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {'slots': self.slots, 'in_use': self._in_use}
+
+
+cpu_budget = CpuBudget(CPU_BUDGET)
+
+
+class _BudgetHold:
+    """Slots held by one submitted job; released once, when it finishes or is abandoned"""
+
+    def __init__(self, weight: int):
+        self.weight = weight
+        self._held = True
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        cpu_budget.release(self.weight)
+
+
+def submit_budgeted(executor, fn: Callable, *args, weight: int = 1,
+                    timeout: Optional[float] = None) -> Optional[Future]:
+    """Submit to a worker process pool, holding weight budget slots until the job finishes or is abandoned.
+
+    Returns None when the slots don't free up within timeout seconds.
+    """
+    if not cpu_budget.acquire(weight, timeout):
+        return None
+    hold = _BudgetHold(weight)
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        hold.release()
+        raise
+    future.budget_hold = hold
+    future.add_done_callback(lambda _: hold.release())
+    return future
+
+
+def abandon(future: Future):
+    """Give up on a budgeted job: cancel it if it hasn't started, and stop counting it against the budget.
+
+    A worker that is already running it can't be interrupted; it finishes
+    in the background without holding slots.
+    """
+    future.cancel()
+    hold = getattr(future, 'budget_hold', None)
+    if hold is not None:
+        hold.release()
+
+
+class TablePool:
+    """Bounded thread pool for table page and region jobs.
+
+    The work is OpenCV, NumPy and waits on Tesseract workers, all of which
+    release the GIL, so threads run it in parallel. A job takes its budget
+    slot when it starts, not while it is queued, and lends it to its
+    Tesseract jobs while it waits on them.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_TABLE_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='table')
+
+    @staticmethod
+    def _run(fn: Callable, args: tuple):
+        with cpu_budget:
+            return fn(*args)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        return self._executor.submit(self._run, fn, args)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_shared_table_pool: Optional[TablePool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_table_pool() -> TablePool:
+    global _shared_table_pool
+    with _shared_lock:
+        if _shared_table_pool is None:
+            _shared_table_pool = TablePool()
+            logger.info(f"Started table pool with {_shared_table_pool.max_workers} workers, CPU budget {CPU_BUDGET}")
+        return _shared_table_pool
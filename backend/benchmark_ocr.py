@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import time
+
+app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+sys.path.insert(0, app_dir)
+
+import fitz
+from ocr_processor import OCRProcessor, PDF_RENDER_ZOOM
+from ocr_worker import _recognize_batch
+from raster import render_page
+
+
+def load_pages(file_path, max_pages):
+    doc = fitz.open(file_path)
+    count = len(doc) if max_pages is None else min(len(doc), max_pages)
+    pages = [(index + 1, render_page(doc.load_page(index), PDF_RENDER_ZOOM), PDF_RENDER_ZOOM) for index in range(count)]
+    doc.close()
+    return pages
+
+
+def run_per_page(processor, pages):
+    for page in pages:
+        _recognize_batch(processor.reader, processor.tesseract_available, [page], 1)
+
+
+def run_batched(processor, pages, batch_size):
+    batch = []
+    for page in pages:
+        if batch and (len(batch) >= batch_size or batch[0][1].shape != page[1].shape):
+            _recognize_batch(processor.reader, processor.tesseract_available, batch, batch_size)
+            batch = []
+        batch.append(page)
+    if batch:
+        _recognize_batch(processor.reader, processor.tesseract_available, batch, batch_size)
+
+
+def timed(label, fn, page_count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.2f}s  {page_count / elapsed:6.2f} pages/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-page and batched EasyOCR throughput on a PDF")
+    parser.add_argument('pdf', help="Scanned PDF to benchmark")
+    parser.add_argument('--batch-sizes', default='2,4,8', help="Comma-separated batch sizes to try")
+    parser.add_argument('--max-pages', type=int, default=None)
+    args = parser.parse_args()
+
+    processor = OCRProcessor(max_workers=1)
+    if not processor.reader:
+        print("EasyOCR is not available")
+        return
+
+    pages = load_pages(args.pdf, args.max_pages)
+    print(f"Rendered {len(pages)} pages at {PDF_RENDER_ZOOM}x")
+
+    # Warm up the models so the first timed run does not pay for lazy initialization
+    run_per_page(processor, pages[:1])
+
+    timed("per-page", lambda: run_per_page(processor, pages), len(pages))
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        timed(f"batched (size {batch_size})", lambda: run_batched(processor, pages, batch_size), len(pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import os
+import sys
+import time
+
+app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
+sys.path.insert(0, app_dir)
+
+import fitz
+import numpy as np
+from PIL import Image
+
+from escalation import MIN_CONFIDENCE
+from ocr_backends import available_backends, create_backend
+from ocr_processor import OCR_LANGUAGES, PDF_RENDER_ZOOM
+from raster import render_page
+
+SAMPLE_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+
+def find_samples(paths):
+    samples = []
+    for path in paths:
+        if os.path.isdir(path):
+            samples.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(SAMPLE_EXTENSIONS)
+            )
+        else:
+            samples.append(path)
+    return samples
+
+
+def load_pages(file_path, max_pages):
+    if file_path.lower().endswith('.pdf'):
+        doc = fitz.open(file_path)
+        count = len(doc) if max_pages is None else min(len(doc), max_pages)
+        pages = [render_page(doc.load_page(index), PDF_RENDER_ZOOM) for index in range(count)]
+        doc.close()
+        return pages
+
+    with Image.open(file_path) as image:
+        count = getattr(image, 'n_frames', 1)
+        if max_pages is not None:
+            count = min(count, max_pages)
+        pages = []
+        for index in range(count):
+            image.seek(index)
+            pages.append(np.array(image.convert('L')))
+        return pages
+
+
+def load_truth(file_path):
+    """Reference text from a .txt file next to the sample, if there is one"""
+    truth_path = os.path.splitext(file_path)[0] + '.txt'
+    if not os.path.exists(truth_path):
+        return None
+    with open(truth_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def word_error_rate(reference, hypothesis):
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_backend(name, samples):
+    try:
+        reader = create_backend(name, OCR_LANGUAGES)
+    except Exception as e:
+        print(f"{name:<12} unavailable: {e}")
+        return
+
+    # Warm up so the first timed sample does not pay for lazy model loading
+    first_pages = next((pages for _, pages, _ in samples if pages), None)
+    if first_pages:
+        reader.readtext(first_pages[0], detail=1)
+
+    page_count = 0
+    elapsed = 0.0
+    confidences = []
+    error_rates = []
+    for _, pages, truth in samples:
+        texts = []
+        for page in pages:
+            start = time.perf_counter()
+            results = reader.readtext(page, detail=1)
+            elapsed += time.perf_counter() - start
+            page_count += 1
+            for _, text, confidence in (result[:3] for result in results or []):
+                if confidence > MIN_CONFIDENCE and text.strip():
+                    texts.append(text.strip())
+                    confidences.append(confidence)
+        if truth is not None:
+            error_rates.append(word_error_rate(truth, ' '.join(texts)))
+
+    pages_per_sec = page_count / elapsed if elapsed else 0.0
+    mean_confidence = np.mean(confidences) if confidences else 0.0
+    wer = f"{np.mean(error_rates):6.3f}" if error_rates else "   n/a"
+    print(f"{name:<12} {page_count:6d} {elapsed:9.2f}s {pages_per_sec:9.2f} {mean_confidence:9.3f} {wer}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare OCR backends for speed and accuracy on a sample set. "
+                    "A sample's reference text is read from a .txt file with the same name, when present."
+    )
+    parser.add_argument('samples', nargs='+', help="Sample PDFs/images, or directories of them")
+    parser.add_argument('--backends', default=','.join(available_backends()),
+                        help="Comma-separated backends to compare")
+    parser.add_argument('--max-pages', type=int, default=None, help="Pages per sample")
+    args = parser.parse_args()
+
+    samples = [
+        (path, load_pages(path, args.max_pages), load_truth(path))
+        for path in find_samples(args.samples)
+    ]
+    print(f"Loaded {sum(len(pages) for _, pages, _ in samples)} pages from {len(samples)} samples")
+    print(f"{'backend':<12} {'pages':>6} {'time':>10} {'pages/s':>9} {'mean conf':>9} {'WER':>6}")
+
+    for name in args.backends.split(','):
+        run_backend(name.strip(), samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,11 @@ from typing import Dict, List
 import asyncio
 
 class TemplateGenerator:
+    # Preprocessing every generated template starts with; also used before a document's type is known
+    DEFAULT_PREPROCESSING = ['enhance_contrast', 'deskew']
+    # Uploads not yet classified skip deskew: boxes on deskewed pages stay in the rotated frame
+    UNTYPED_PREPROCESSING = ['enhance_contrast']
+
     def __init__(self):
         self.templates = {}
         self.load_existing_templates()
@@ -107,7 +112,7 @@ class TemplateGenerator:
     
     def _generate_extraction_rules(self, document_type, field_patterns):
         rules = {
-            'preprocessing': ['enhance_contrast', 'deskew'],
+            'preprocessing': list(self.DEFAULT_PREPROCESSING),
             'field_extraction': {},
             'validation': {}
         }
@@ -133,8 +138,15 @@ class TemplateGenerator:
     
     def get_all_templates(self):
         return list(self.templates.values())
-
-template_generator = TemplateGenerator()
+    
+    def get_preprocessing(self, document_type):
+        # New uploads are OCR'd before they are classified, so an unknown type gets the untyped rules
+        if not document_type:
+            return list(self.UNTYPED_PREPROCESSING)
+        template = self.get_template(document_type)
+        if not template:
+            return []
+        return template.get('extraction_rules', {}).get('preprocessing', [])
 
 app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app')
 sys.path.insert(0, app_dir)
@@ -143,12 +155,17 @@ from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, F
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from database import get_db, create_tables
 from models import User, Document, ExtractionTemplate, ProcessingLog
 from auth import authenticate_user, create_access_token, get_current_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
 from ocr_processor import OCRProcessor
-from qa_processor import QuestionAnsweringProcessor
+from ocr_cache import OCRResultCache
+from raster import PageRasterCache
+from roi import has_regions
+from worker_pool import cpu_budget
 
 def convert_numpy_types(obj):
     if isinstance(obj, np.integer):
@@ -167,9 +184,12 @@ class TableExtractor:
     def __init__(self):
         print("TableExtractor initialized")
 
-    def extract_tables(self, file_path):
+    def extract_tables(self, file_path, raster_cache=None, document_type=None, ocr_result=None):
         return []
 
+    def extract_tables_with_metadata(self, file_path, raster_cache=None, document_type=None, ocr_result=None):
+        return {'tables': [], 'metadata': {}}
+
 class DocumentClassifier:
     def __init__(self):
         print("DocumentClassifier initialized")
@@ -301,9 +321,6 @@ def create_sample_users():
     finally:
         db.close()
 
-create_tables()
-create_sample_users()
-
 app = FastAPI(title="SmartDoc AI Processor", version="1.0.0")
 
 app.add_middleware(
@@ -314,19 +331,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-ocr_processor = OCRProcessor()
-table_extractor = TableExtractor()
-document_classifier = DocumentClassifier()
-data_redactor = DataRedactor()
-kv_extractor = KeyValueExtractor()
-qa_processor = QuestionAnsweringProcessor()
+# The uploads directory is created at startup, so it is not checked here
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
+
+# Built at startup, not on import: spawned OCR and Tesseract workers re-run this file as __mp_main__,
+# and must not touch the database or load their own copies of the models
+template_generator = None
+ocr_processor = None
+table_extractor = None
+document_classifier = None
+data_redactor = None
+kv_extractor = None
+qa_processor = None
+
+@app.on_event("startup")
+async def load_services():
+    global template_generator, ocr_processor, table_extractor, document_classifier, data_redactor
+    global kv_extractor, qa_processor
+    from qa_processor import QuestionAnsweringProcessor
+
+    create_tables()
+    create_sample_users()
+    os.makedirs("uploads", exist_ok=True)
+
+    template_generator = TemplateGenerator()
+    ocr_processor = OCRProcessor(cache=OCRResultCache())
+    table_extractor = TableExtractor()
+    document_classifier = DocumentClassifier()
+    data_redactor = DataRedactor()
+    kv_extractor = KeyValueExtractor()
+    qa_processor = QuestionAnsweringProcessor()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    ocr_processor.close()
 
 async def process_document_background(document_id: int, user_id: int):
     from database import SessionLocal
     db = SessionLocal()
+    raster_cache = None
     
     try:
         document = db.query(Document).filter(
@@ -352,7 +395,11 @@ async def process_document_background(document_id: int, user_id: int):
         print(f"Starting OCR with: {type(ocr_processor)}")
         print(f"OCR Reader available: {hasattr(ocr_processor, 'reader') and ocr_processor.reader is not None}")
         
-        ocr_result = ocr_processor.process_document(document.file_path)
+        raster_cache = PageRasterCache(document.file_path)
+        ocr_result = ocr_processor.process_document(
+            document.file_path, raster_cache=raster_cache, document_type=document.document_type,
+            preprocessing=template_generator.get_preprocessing(document.document_type)
+        )
         print(f"OCR Result keys: {list(ocr_result.keys())}")
         print(f"Text length: {len(ocr_result.get('text', ''))}")
         print(f"Word count: {ocr_result.get('word_count', 0)}")
@@ -367,13 +414,19 @@ async def process_document_background(document_id: int, user_id: int):
 
         classification = document_classifier.classify_document(extracted_text)
         print(f"Classification: {classification}")
+        if ocr_result.get('tesseract_config_accepted'):
+            ocr_processor.tesseract_search.record_winner('ocr', classification['type'], ocr_result['tesseract_config'])
 
         ai_overview = document_classifier.generate_ai_overview(extracted_text, classification['type'])
-        tables = table_extractor.extract_tables(document.file_path)
+        table_result = table_extractor.extract_tables_with_metadata(
+            document.file_path, raster_cache=raster_cache, document_type=classification['type'],
+            ocr_result=ocr_result
+        )
+        tables = table_result['tables']
         kv_pairs = kv_extractor.extract_key_value_pairs(extracted_text, bounding_boxes)
 
         try:
-            layout = ocr_processor.extract_layout_elements(document.file_path)
+            layout = ocr_processor.extract_layout_elements(ocr_result)
         except Exception as e:
             print(f"Layout extraction failed: {e}")
             layout = {'headers': [], 'paragraphs': [], 'lists': [], 'tables': []}
@@ -393,6 +446,10 @@ async def process_document_background(document_id: int, user_id: int):
             'template_id': template.get('name'),
             'processing_time': datetime.utcnow().isoformat(),
             'text_length': int(len(extracted_text)),
+            'ocr_timings': convert_numpy_types(ocr_result.get('timings', {})),
+            'ocr_partial_pages': ocr_result.get('partial_pages', []),
+            'ocr_page_cache': ocr_result.get('page_cache'),
+            'table_extraction': table_result['metadata'],
             'word_count': int(len(extracted_text.split()) if extracted_text else 0)
         }
 
@@ -423,6 +480,8 @@ async def process_document_background(document_id: int, user_id: int):
             print(f"Rollback failed: {rollback_error}")
     
     finally:
+        if raster_cache is not None:
+            raster_cache.close()
         db.close()
 
 @app.get("/")
@@ -446,7 +505,11 @@ async def health_check():
             "redaction": "active",
             "key_value_extraction": "active",
             "question_answering": "active"
-        }
+        },
+        "ocr_cache": ocr_processor.cache.stats() if ocr_processor.cache else None,
+        "ocr_escalation": ocr_processor.escalation_stats(),
+        "ocr_backend": ocr_processor.engine_name(),
+        "cpu_budget": cpu_budget.stats()
     }
 
 @app.post("/token")
@@ -468,9 +531,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 async def upload_documents(
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
+    template_type: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    # A template picked at upload gives OCR its preprocessing rules and document type before classification
+    template = template_generator.get_template(template_type) if template_type else None
+    if template_type and not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+
     results = []
     for file in files:
         allowed_types = ['application/pdf', 'image/jpeg', 'image/png', 'image/tiff', 'image/jpg']
@@ -497,6 +566,7 @@ async def upload_documents(
                 file_type=file.content_type,
                 file_size=os.path.getsize(file_path),
                 owner_id=current_user.id,
+                document_type=template.get('document_type') if template else None,
                 status="uploaded"
             )
             db.add(document)
@@ -538,6 +608,7 @@ async def process_document(document_id: int, current_user: User = Depends(get_cu
         file_size = os.path.getsize(document.file_path)
         print(f"File size: {file_size} bytes")
     
+    raster_cache = None
     try:
         document.status = "processing"
         db.commit()
@@ -545,7 +616,11 @@ async def process_document(document_id: int, current_user: User = Depends(get_cu
         print(f"Starting OCR with: {type(ocr_processor)}")
         print(f"OCR Reader available: {hasattr(ocr_processor, 'reader') and ocr_processor.reader is not None}")
         
-        ocr_result = ocr_processor.process_document(document.file_path)
+        raster_cache = PageRasterCache(document.file_path)
+        ocr_result = ocr_processor.process_document(
+            document.file_path, raster_cache=raster_cache, document_type=document.document_type,
+            preprocessing=template_generator.get_preprocessing(document.document_type)
+        )
         print(f"OCR Result keys: {list(ocr_result.keys())}")
         print(f"Text length: {len(ocr_result.get('text', ''))}")
         print(f"Word count: {ocr_result.get('word_count', 0)}")
@@ -560,13 +635,19 @@ async def process_document(document_id: int, current_user: User = Depends(get_cu
 
         classification = document_classifier.classify_document(extracted_text)
         print(f"Classification: {classification}")
+        if ocr_result.get('tesseract_config_accepted'):
+            ocr_processor.tesseract_search.record_winner('ocr', classification['type'], ocr_result['tesseract_config'])
 
         ai_overview = document_classifier.generate_ai_overview(extracted_text, classification['type'])
-        tables = table_extractor.extract_tables(document.file_path)
+        table_result = table_extractor.extract_tables_with_metadata(
+            document.file_path, raster_cache=raster_cache, document_type=classification['type'],
+            ocr_result=ocr_result
+        )
+        tables = table_result['tables']
         kv_pairs = kv_extractor.extract_key_value_pairs(extracted_text, bounding_boxes)
 
         try:
-            layout = ocr_processor.extract_layout_elements(document.file_path)
+            layout = ocr_processor.extract_layout_elements(ocr_result)
         except Exception as e:
             print(f"Layout extraction failed: {e}")
             layout = {'headers': [], 'paragraphs': [], 'lists': [], 'tables': []}
@@ -586,6 +667,10 @@ async def process_document(document_id: int, current_user: User = Depends(get_cu
             'template_id': template.get('name'),
             'processing_time': datetime.utcnow().isoformat(),
             'text_length': int(len(extracted_text)),
+            'ocr_timings': convert_numpy_types(ocr_result.get('timings', {})),
+            'ocr_partial_pages': ocr_result.get('partial_pages', []),
+            'ocr_page_cache': ocr_result.get('page_cache'),
+            'table_extraction': table_result['metadata'],
             'word_count': int(len(extracted_text.split()) if extracted_text else 0)
         }
 
@@ -633,6 +718,10 @@ async def process_document(document_id: int, current_user: User = Depends(get_cu
         
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+    finally:
+        if raster_cache is not None:
+            raster_cache.close()
+
 @app.get("/templates")
 async def get_templates(current_user: User = Depends(get_current_user)):
     templates = template_generator.get_all_templates()
@@ -676,10 +765,90 @@ async def process_with_template(
     db: Session = Depends(get_db)
 ):
     template = template_generator.get_template(template_type)
-    if not template:
+    db_template = db.query(ExtractionTemplate).filter(
+        ExtractionTemplate.creator_id == current_user.id,
+        ExtractionTemplate.is_active == True,
+        or_(ExtractionTemplate.name == template_type, ExtractionTemplate.document_type == template_type)
+    ).first()
+    if not template and not db_template:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    return await process_document(document_id, current_user, db)
+    if db_template and has_regions(db_template.fields):
+        fields = db_template.fields
+        document_type = db_template.document_type
+    else:
+        fields = (template or {}).get('fields')
+        document_type = (template or {}).get('document_type', template_type)
+    
+    # Templates without field coordinates get the full pipeline
+    if not has_regions(fields):
+        return await process_document(document_id, current_user, db)
+    
+    document = db.query(Document).filter(Document.id == document_id, Document.owner_id == current_user.id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    try:
+        document.status = "processing"
+        db.commit()
+        
+        # Fixed forms: OCR only the template's field regions
+        started = datetime.utcnow()
+        field_result = ocr_processor.extract_fields(
+            document.file_path, fields, preprocessing=template_generator.get_preprocessing(template_type)
+        )
+        print(f"Template fields: {len(field_result['key_value_pairs'])} of {field_result['regions_processed']} read")
+        
+        # Nothing readable where the template expects it: probably a different layout, so do the full run
+        if not field_result['key_value_pairs']:
+            return await process_document(document_id, current_user, db)
+        
+        kv_pairs = convert_numpy_types(field_result['key_value_pairs'])
+        extracted_data = {
+            'template_id': template_type,
+            'template_fields': convert_numpy_types(field_result['fields']),
+            'missing_fields': field_result['missing_fields'],
+            'pages_rendered': field_result['pages_rendered'],
+            'processing_seconds': (datetime.utcnow() - started).total_seconds(),
+            'processing_time': datetime.utcnow().isoformat(),
+            'text_length': len(field_result['text']),
+            'word_count': field_result['word_count']
+        }
+        
+        document.extracted_text = field_result['text']
+        document.document_type = str(document_type)
+        document.key_value_pairs = kv_pairs
+        document.extracted_data = extracted_data
+        document.status = "completed"
+        document.processed_at = datetime.utcnow()
+        
+        db.commit()
+        
+        return {
+            "document_id": document.id,
+            "status": "completed",
+            "document_type": document_type,
+            "template_name": template_type,
+            "extracted_text": field_result['text'],
+            "key_value_pairs": kv_pairs,
+            "fields": extracted_data['template_fields'],
+            "missing_fields": field_result['missing_fields']
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"TEMPLATE PROCESSING FAILED: {e}")
+        
+        try:
+            db.rollback()
+            db.refresh(document)
+            document.status = "failed"
+            db.commit()
+        except Exception as rollback_error:
+            print(f"Rollback failed: {rollback_error}")
+        
+        raise HTTPException(status_code=500, detail=f"Template processing failed: {str(e)}")
 
 @app.get("/documents")
 async def get_documents(
@@ -740,6 +909,43 @@ async def get_document_details(
         "processed_at": document.processed_at
     }
 
+@app.get("/documents/{document_id}/ocr-stream")
+async def stream_document_ocr(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.owner_id == current_user.id
+    ).first()
+    
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    if not os.path.exists(document.file_path):
+        raise HTTPException(status_code=404, detail="Document file not found")
+    
+    file_path = document.file_path
+    preprocessing = template_generator.get_preprocessing(document.document_type)
+    
+    # Newline-delimited JSON: one line per page as soon as it is recognized, then a summary line
+    def page_stream():
+        raster_cache = PageRasterCache(file_path)
+        try:
+            pages = 0
+            for page_result in ocr_processor.iter_pages(file_path, raster_cache=raster_cache, preprocessing=preprocessing):
+                pages += 1
+                yield json.dumps(convert_numpy_types(page_result)) + "\n"
+            yield json.dumps({"done": True, "pages": pages}) + "\n"
+        except Exception as e:
+            print(f"OCR stream failed for document {document_id}: {e}")
+            yield json.dumps({"done": True, "error": str(e)}) + "\n"
+        finally:
+            raster_cache.close()
+    
+    return StreamingResponse(page_stream(), media_type="application/x-ndjson")
+
 @app.post("/redact/{document_id}")
 async def redact_document(
     document_id: int,